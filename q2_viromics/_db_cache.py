@@ -0,0 +1,136 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+
+
+# Location of the extracted databases. Can be moved with Q2_VIROMICS_CACHE_DIR,
+# e.g. to a fast local disk on a cluster node.
+def get_cache_dir():
+    cache_root = os.environ.get("Q2_VIROMICS_CACHE_DIR")
+    if not cache_root:
+        xdg_cache = os.environ.get(
+            "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+        )
+        cache_root = os.path.join(xdg_cache, "q2-viromics")
+    return os.path.join(cache_root, "checkv-db")
+
+
+# Pack a directory into a single zip archive. Every member is compressed on
+# its own and listed in the central directory, so single members can be read
+# without decompressing the whole archive.
+def pack_directory(src_dir, archive_fp):
+    with zipfile.ZipFile(
+        archive_fp, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True
+    ) as zf:
+        members = [
+            os.path.relpath(os.path.join(root, file_name), src_dir)
+            for root, _, files in os.walk(src_dir)
+            for file_name in files
+        ]
+        for member in sorted(members):
+            zf.write(os.path.join(src_dir, member), member)
+
+
+# Fingerprint an archive from its table of contents (member names, sizes and
+# CRC-32 checksums), which avoids reading the compressed data
+def archive_fingerprint(archive_fp):
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(archive_fp) as zf:
+        for info in sorted(zf.infolist(), key=lambda info: info.filename):
+            digest.update(f"{info.filename}\t{info.file_size}\t{info.CRC}\n".encode())
+    return digest.hexdigest()
+
+
+# Check that every member listed in the completion marker of an extracted
+# archive is present with its original size
+def _is_complete(target, marker):
+    try:
+        with open(marker) as fh:
+            members = [line.rstrip("\n").rsplit("\t", 1) for line in fh]
+    except FileNotFoundError:
+        return False
+
+    try:
+        return all(
+            os.path.getsize(os.path.join(target, name)) == int(size)
+            for name, size in members
+        )
+    except (OSError, ValueError):
+        return False
+
+
+# Write the completion marker, which lists the name and size of every member
+def _write_marker(archive_fp, marker):
+    marker_tmp = f"{marker}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(archive_fp) as zf, open(marker_tmp, "w") as fh:
+        for info in zf.infolist():
+            if not info.is_dir():
+                fh.write(f"{info.filename}\t{info.file_size}\n")
+    os.replace(marker_tmp, marker)
+
+
+# Extract an archive into the cache unless it was extracted before and return
+# the path of the extracted directory. An extraction is only reused if its
+# completion marker (<fingerprint>.members) matches the files on disk.
+def extract_to_cache(archive_fp, cache_dir=None):
+    cache_dir = cache_dir or get_cache_dir()
+    fingerprint = archive_fingerprint(archive_fp)
+    target = os.path.join(cache_dir, fingerprint)
+    marker = f"{target}.members"
+    if os.path.isdir(target):
+        if _is_complete(target, marker):
+            return target
+        # Move the incomplete extraction out of the way before deleting it, so
+        # that the target is never seen half deleted
+        stale = tempfile.mkdtemp(prefix=f".{fingerprint}-", dir=cache_dir)
+        try:
+            os.rename(target, os.path.join(stale, fingerprint))
+        except OSError:
+            # Another process moved it first
+            pass
+        shutil.rmtree(stale, ignore_errors=True)
+
+    # Extract next to the target and rename it once complete, so that an
+    # interrupted or concurrent extraction never leaves a partial database
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{fingerprint}-", dir=cache_dir)
+    try:
+        with zipfile.ZipFile(archive_fp) as zf:
+            zf.extractall(staging)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another process finished extracting the same database first
+            if not os.path.isdir(target):
+                raise
+            shutil.rmtree(staging)
+        else:
+            _write_marker(archive_fp, marker)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target
+
+
+# Recreate the tree of src_dir in dst_dir with links to the original files.
+# Hard links are used where possible and symbolic links across file systems.
+def link_tree(src_dir, dst_dir):
+    for root, _, files in os.walk(src_dir):
+        dst_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(dst_root, exist_ok=True)
+        for file_name in files:
+            src = os.path.join(root, file_name)
+            dst = os.path.join(dst_root, file_name)
+            try:
+                os.link(src, dst)
+            except OSError:
+                os.symlink(src, dst)
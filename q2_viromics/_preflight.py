@@ -0,0 +1,224 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import multiprocessing as mp
+from collections import namedtuple
+
+# IUPAC nucleotide codes accepted by CheckV, plus line endings
+ALLOWED_SEQUENCE_BYTES = b"ACGTUNRYKMSWBDHVacgtunrykmswbdhv\r\n"
+CHUNK_SIZE = 16 * 1024 * 1024
+MAX_REPORTED = 5
+
+# unknown_gene_contigs lists the contigs named in the supplied gene
+# predictions that are not in the sample; empty_genes is set if the supplied
+# gene predictions of a sample with contigs contain no proteins
+FastaStats = namedtuple(
+    "FastaStats",
+    [
+        "contigs",
+        "base_pairs",
+        "duplicated_ids",
+        "invalid_characters",
+        "headerless",
+        "unknown_gene_contigs",
+        "empty_genes",
+    ],
+    defaults=[[], False],
+)
+
+
+# Yield the (start, end) positions of the header lines in a block of lines.
+# Searching for the single byte ">" is much faster than searching for "\n>".
+def _header_spans(data):
+    start = data.find(b">")
+    while start != -1:
+        if start > 0 and data[start - 1] != ord("\n"):
+            # ">" within a header line
+            start = data.find(b">", start + 1)
+            continue
+        end = data.find(b"\n", start)
+        end = len(data) if end == -1 else end
+        yield start, end
+        start = data.find(b">", end)
+
+
+# Read the IDs of the contigs the predicted proteins belong to, from headers
+# such as ">contig_1_5 # 2 # 1021 # 1 # partial=00"
+def _read_gene_contig_ids(proteins_fp):
+    contig_ids = set()
+    with open(proteins_fp, "rb") as fh:
+        for line in fh:
+            if line.startswith(b">"):
+                fields = line[1:].split(maxsplit=1)
+                gene_id = fields[0] if fields else b""
+                contig_ids.add(gene_id.rsplit(b"_", 1)[0])
+    return contig_ids
+
+
+# Count the bytes of a block of lines that are neither line endings nor part
+# of the given header lines
+def _count_sequence_bytes(data, headers):
+    header_bytes = sum(len(header) for header in headers)
+    header_cr = sum(header.count(b"\r") for header in headers)
+    carriage_returns = data.count(b"\r") if b"\r" in data else 0
+    return len(data) - header_bytes - data.count(b"\n") - (carriage_returns - header_cr)
+
+
+# Scan a FASTA file in large chunks. Only the header lines are handled one by
+# one; counting bases and looking for invalid characters is done with a few
+# bytes operations over the whole chunk, so the work done in Python scales
+# with the number of contigs rather than with the number of lines or bases.
+# If the proteins predicted for the sample are given, the contigs they belong
+# to are checked against the contigs of the sample.
+def scan_fasta(fp, chunk_size=CHUNK_SIZE, proteins_fp=None):
+    contigs, base_pairs = 0, 0
+    seen_ids, duplicated_ids, invalid = set(), set(), set()
+    headerless = False
+
+    with open(fp, "rb") as fh:
+        while True:
+            data = fh.read(chunk_size)
+            if not data:
+                break
+            # Only process complete lines
+            if not data.endswith(b"\n"):
+                data += fh.readline()
+
+            spans = list(_header_spans(data))
+            headers = [data[start:end] for start, end in spans]
+
+            if contigs == 0:
+                before_first_header = data[: spans[0][0]] if spans else data
+                headerless = headerless or bool(before_first_header.strip())
+
+            for header in headers:
+                fields = header[1:].split(maxsplit=1)
+                contig_id = fields[0] if fields else b""
+                if contig_id in seen_ids:
+                    duplicated_ids.add(contig_id.decode(errors="replace"))
+                seen_ids.add(contig_id)
+            contigs += len(headers)
+
+            # Bytes left after deleting the allowed ones that do not come from
+            # the headers are invalid characters, which are not counted as
+            # bases
+            remaining = data.translate(None, ALLOWED_SEQUENCE_BYTES)
+            expected = b"".join(headers).translate(None, ALLOWED_SEQUENCE_BYTES)
+            base_pairs += _count_sequence_bytes(data, headers) - (
+                len(remaining) - len(expected)
+            )
+            if len(remaining) != len(expected):
+                ends = [0] + [end for _, end in spans]
+                starts = [start for start, _ in spans] + [len(data)]
+                sequences = b"".join(data[e:s] for e, s in zip(ends, starts))
+                invalid.update(sequences.translate(None, ALLOWED_SEQUENCE_BYTES))
+
+    unknown_gene_contigs, empty_genes = [], False
+    if proteins_fp is not None:
+        gene_contig_ids = _read_gene_contig_ids(proteins_fp)
+        unknown_gene_contigs = sorted(
+            contig_id.decode(errors="replace")
+            for contig_id in gene_contig_ids - seen_ids
+        )
+        empty_genes = contigs > 0 and not gene_contig_ids
+
+    return FastaStats(
+        contigs,
+        base_pairs,
+        sorted(duplicated_ids),
+        sorted(chr(character) for character in invalid),
+        headerless,
+        unknown_gene_contigs,
+        empty_genes,
+    )
+
+
+# Count the contigs and base pairs of a FASTA file that already passed
+# preflight_check, without checking it again
+def count_fasta(fp, chunk_size=CHUNK_SIZE):
+    contigs, base_pairs = 0, 0
+    with open(fp, "rb") as fh:
+        while True:
+            data = fh.read(chunk_size)
+            if not data:
+                break
+            if not data.endswith(b"\n"):
+                data += fh.readline()
+
+            headers = [data[start:end] for start, end in _header_spans(data)]
+            contigs += len(headers)
+            base_pairs += _count_sequence_bytes(data, headers)
+
+    return FastaStats(contigs, base_pairs, [], [], False)
+
+
+def _format_examples(values):
+    examples = ", ".join(repr(value) for value in values[:MAX_REPORTED])
+    if len(values) > MAX_REPORTED:
+        examples += f" and {len(values) - MAX_REPORTED} more"
+    return examples
+
+
+# Check all samples before CheckV is run and report every problem at once.
+# proteins optionally maps sample IDs to previously predicted proteins.
+# Returns the statistics of every sample, which include the empty samples.
+def preflight_check(samples, num_threads=1, proteins=None):
+    proteins = proteins or {}
+    sample_ids = list(samples)
+    arguments = [
+        (samples[sample_id], CHUNK_SIZE, proteins.get(sample_id))
+        for sample_id in sample_ids
+    ]
+    if num_threads > 1 and len(arguments) > 1:
+        with mp.Pool(min(num_threads, len(arguments))) as pool:
+            results = pool.starmap(scan_fasta, arguments)
+    else:
+        results = [scan_fasta(*args) for args in arguments]
+    stats = dict(zip(sample_ids, results))
+
+    problems = []
+    for sample_id, sample_stats in stats.items():
+        if "_" in sample_id:
+            problems.append(
+                f"Sample ID {sample_id!r} contains an underscore. Output file "
+                "names are split on underscores to recover the sample IDs."
+            )
+        if sample_stats.headerless:
+            problems.append(
+                f"Sample {sample_id!r} contains sequence data before the "
+                "first FASTA header."
+            )
+        if sample_stats.duplicated_ids:
+            problems.append(
+                f"Sample {sample_id!r} contains duplicated contig IDs: "
+                f"{_format_examples(sample_stats.duplicated_ids)}."
+            )
+        if sample_stats.invalid_characters:
+            problems.append(
+                f"Sample {sample_id!r} contains non-nucleotide characters: "
+                f"{_format_examples(sample_stats.invalid_characters)}."
+            )
+        if sample_stats.unknown_gene_contigs:
+            problems.append(
+                f"The predicted genes of sample {sample_id!r} belong to contigs "
+                "that are not in the sample, so they were not predicted from "
+                "these sequences: "
+                f"{_format_examples(sample_stats.unknown_gene_contigs)}."
+            )
+        if sample_stats.empty_genes:
+            problems.append(
+                f"The predicted genes of sample {sample_id!r} contain no "
+                "proteins, but the sample contains contigs."
+            )
+
+    if problems:
+        raise ValueError(
+            "The input sequences cannot be analyzed with CheckV:\n"
+            + "\n".join(f"  - {problem}" for problem in problems)
+        )
+
+    return stats
@@ -0,0 +1,253 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import datetime
+import fcntl
+import json
+import threading
+import time
+import uuid
+
+# Seconds between two progress reports while a sample is being analyzed
+PROGRESS_INTERVAL = 60
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return "unknown"
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+
+# Describe a run over all samples. It is passed to the reporters of the
+# partitions of the run, so that their reports cover the whole run.
+def new_run_context(sample_stats):
+    return {
+        "run_id": uuid.uuid4().hex,
+        "started": time.time(),
+        "samples_total": len(sample_stats),
+        "contigs_total": sum(stats.contigs for stats in sample_stats.values()),
+        "base_pairs_total": sum(stats.base_pairs for stats in sample_stats.values()),
+    }
+
+
+# Report the progress of an analysis over a set of samples whose sizes are
+# known up front. A report is printed (and appended as a JSON line to
+# progress_file, if given) when the analysis starts, every `interval` seconds,
+# after each sample and when the analysis ends.
+#
+# If the samples are one partition of a run (see new_run_context), the
+# partition's start and end are reported as partition_start and
+# partition_finish. The partitions of a run share the progress file: the
+# samples done by the other partitions are read from it, so that every report
+# covers the whole run, and the partition that completes the run reports its
+# end. Without a progress file, each partition can only report on itself.
+class ProgressReporter:
+    def __init__(
+        self,
+        sample_stats,
+        progress_file=None,
+        interval=PROGRESS_INTERVAL,
+        run_context=None,
+    ):
+        self.sample_stats = sample_stats
+        self.progress_file = progress_file
+        self.interval = interval
+        self.run_context = run_context
+        self.partition_id = run_context.get("partition_id") if run_context else None
+        self.run_level = run_context is not None and progress_file is not None
+        self.contigs_total = sum(stats.contigs for stats in sample_stats.values())
+        self.base_pairs_total = sum(stats.base_pairs for stats in sample_stats.values())
+        self.samples_done = 0
+        self.contigs_done = 0
+        self.base_pairs_done = 0
+        self.current_sample = None
+        # Progress of the other partitions of the run, read from progress_file
+        self._other_samples_done = 0
+        self._other_contigs_done = 0
+        self._other_base_pairs_done = 0
+        self._read_offset = 0
+        self._run_finished = False
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._start_time = time.monotonic()
+
+    def _event(self, event):
+        if self.run_context is not None:
+            return f"partition_{event}"
+        return event
+
+    def start(self):
+        self._start_time = time.monotonic()
+        self.report(self._event("start"))
+        self._thread = threading.Thread(target=self._report_periodically, daemon=True)
+        self._thread.start()
+
+    def _report_periodically(self):
+        while not self._stopped.wait(self.interval):
+            self.report("progress")
+
+    def sample_started(self, sample_id):
+        with self._lock:
+            self.current_sample = sample_id
+
+    def sample_done(self, sample_id):
+        stats = self.sample_stats[sample_id]
+        with self._lock:
+            self.samples_done += 1
+            self.contigs_done += stats.contigs
+            self.base_pairs_done += stats.base_pairs
+            self.current_sample = None
+        self.report(
+            "sample_done",
+            sample_id=sample_id,
+            sample_contigs=stats.contigs,
+            sample_base_pairs=stats.base_pairs,
+        )
+
+    def stop(self, event="finish"):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.report(event if event == "error" else self._event(event))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop("error" if exc_type is not None else "finish")
+
+    def snapshot(self):
+        with self._lock:
+            if self.run_level:
+                elapsed = time.time() - self.run_context["started"]
+                samples_total = self.run_context["samples_total"]
+                contigs_total = self.run_context["contigs_total"]
+                base_pairs_total = self.run_context["base_pairs_total"]
+                samples_done = self.samples_done + self._other_samples_done
+                contigs_done = self.contigs_done + self._other_contigs_done
+                base_pairs_done = self.base_pairs_done + self._other_base_pairs_done
+            else:
+                elapsed = time.monotonic() - self._start_time
+                samples_total = len(self.sample_stats)
+                contigs_total = self.contigs_total
+                base_pairs_total = self.base_pairs_total
+                samples_done = self.samples_done
+                contigs_done = self.contigs_done
+                base_pairs_done = self.base_pairs_done
+
+            contigs_per_second = contigs_done / elapsed if elapsed else 0.0
+            base_pairs_per_second = base_pairs_done / elapsed if elapsed else 0.0
+            base_pairs_remaining = base_pairs_total - base_pairs_done
+            # The run time of CheckV grows with the number of base pairs
+            if base_pairs_remaining == 0:
+                eta = 0.0
+            elif base_pairs_per_second:
+                eta = base_pairs_remaining / base_pairs_per_second
+            else:
+                eta = None
+            snapshot = {
+                "samples_done": samples_done,
+                "samples_remaining": samples_total - samples_done,
+                "samples_total": samples_total,
+                "current_sample": self.current_sample,
+                "contigs_done": contigs_done,
+                "contigs_total": contigs_total,
+                "base_pairs_done": base_pairs_done,
+                "base_pairs_total": base_pairs_total,
+                "elapsed_seconds": round(elapsed, 3),
+                "contigs_per_second": round(contigs_per_second, 3),
+                "base_pairs_per_second": round(base_pairs_per_second, 3),
+                "eta_seconds": None if eta is None else round(eta, 3),
+            }
+            if self.run_context is not None:
+                snapshot.update(
+                    {
+                        "run_id": self.run_context["run_id"],
+                        "partition_id": self.partition_id,
+                        "partition_samples_done": self.samples_done,
+                        "partition_samples_total": len(self.sample_stats),
+                    }
+                )
+            return snapshot
+
+    # Add up the samples done by the other partitions of the run, from the
+    # records appended to the progress file since it was last read
+    def _read_other_partitions(self, fh):
+        fh.seek(self._read_offset)
+        data = fh.read()
+        self._read_offset += len(data)
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("run_id") != self.run_context["run_id"]:
+                continue
+            if record["event"] == "finish":
+                self._run_finished = True
+            elif (
+                record["event"] == "sample_done"
+                and record.get("partition_id") != self.partition_id
+            ):
+                self._other_samples_done += 1
+                self._other_contigs_done += record["sample_contigs"]
+                self._other_base_pairs_done += record["sample_base_pairs"]
+
+    def _record(self, event, fields):
+        return {
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "event": event,
+            **fields,
+            **self.snapshot(),
+        }
+
+    def report(self, event, **fields):
+        with self._lock:
+            if self.progress_file is None:
+                records = [self._record(event, fields)]
+            else:
+                # Several partitions may append to the same file at once
+                with open(self.progress_file, "ab+") as fh:
+                    fcntl.flock(fh, fcntl.LOCK_EX)
+                    if self.run_level:
+                        self._read_other_partitions(fh)
+                    records = [self._record(event, fields)]
+                    # The last partition to finish also reports the end of
+                    # the run
+                    if (
+                        self.run_level
+                        and event == "partition_finish"
+                        and records[0]["samples_remaining"] == 0
+                        and not self._run_finished
+                    ):
+                        records.append(self._record("finish", {}))
+                        self._run_finished = True
+                    data = "".join(json.dumps(record) + "\n" for record in records)
+                    fh.write(data.encode())
+                    self._read_offset = fh.tell()
+
+        for record in records:
+            self._print(record)
+
+    def _print(self, record):
+        partition = (
+            f" (partition {record['partition_id']})"
+            if record.get("partition_id") is not None
+            else ""
+        )
+        print(
+            f"Progress{partition}: {record['samples_done']}/"
+            f"{record['samples_total']} samples done, "
+            f"{record['samples_remaining']} remaining | "
+            f"{record['contigs_per_second']:.2f} contigs/s | "
+            f"{record['base_pairs_per_second']:.0f} bp/s | "
+            f"elapsed {_format_duration(record['elapsed_seconds'])} | "
+            f"ETA {_format_duration(record['eta_seconds'])}",
+            flush=True,
+        )
@@ -5,6 +5,8 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import os
+import shutil
 import subprocess
 
 EXTERNAL_CMD_WARNING = (
@@ -16,9 +18,42 @@ EXTERNAL_CMD_WARNING = (
 )
 
 
-def run_command(cmd, verbose=True):
+def run_command(cmd, verbose=True, env=None):
     if verbose:
         print(EXTERNAL_CMD_WARNING)
         print("\nCommand:", end=" ")
         print(" ".join(cmd), end="\n\n")
-    subprocess.run(cmd, check=True)
+    subprocess.run(cmd, check=True, env=env)
+
+
+# Map sample IDs to the per-sample files of one CheckV table (e.g. quality_summary)
+def get_sample_tables(data_path, table):
+    suffix = f"_{table}.tsv"
+    return {
+        file_name[: -len(suffix)]: os.path.join(str(data_path), file_name)
+        for file_name in sorted(os.listdir(str(data_path)))
+        if file_name.endswith(suffix)
+    }
+
+
+# Hard link a file, or copy it where hard links are not possible. Only use
+# for files that are never written to afterwards.
+def link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# Append the rows of a table to another one, writing the header first if the
+# destination does not exist yet. If a sample ID is given, it is added to
+# each row as the first column.
+def append_table(src, dst, sample_id=None):
+    with open(src) as fin:
+        header = fin.readline()
+        prefix = "" if sample_id is None else f"{sample_id}\t"
+        with open(dst, "a") as fout:
+            if fout.tell() == 0:
+                fout.write(header if sample_id is None else f"sample_id\t{header}")
+            for line in fin:
+                fout.write(prefix + line)
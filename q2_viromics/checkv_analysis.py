@@ -5,7 +5,9 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import json
 import os
+import shlex
 import shutil
 import subprocess
 import tempfile
@@ -13,14 +15,157 @@ import warnings
 
 from q2_types.per_sample_sequences import ContigSequencesDirFmt
 
-from q2_viromics._utils import run_command
-from q2_viromics.types._format import CheckVDBDirFmt, ViromicsMetadataDirFmt
+from q2_viromics._preflight import count_fasta, preflight_check
+from q2_viromics._progress import ProgressReporter, new_run_context
+from q2_viromics._utils import append_table, link_or_copy, run_command
+from q2_viromics.types._format import (
+    CheckVDBDirFmt,
+    CheckVGenesDirFmt,
+    CheckVIntermediatesDirFmt,
+    ViromicsMetadataDirFmt,
+)
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
+# Extra arguments passed to the DIAMOND blastp and hmmsearch searches run by
+# CheckV for each performance profile. The hmmsearch prefilters are left at
+# their defaults in every profile, as they decide which genes are called viral
+# or host genes.
+PERFORMANCE_PROFILES = {
+    "balanced": {"diamond": [], "hmmsearch": []},
+    "fast": {"diamond": ["--fast"], "hmmsearch": []},
+    "sensitive": {"diamond": ["--more-sensitive"], "hmmsearch": []},
+    "low-memory": {
+        "diamond": ["--block-size", "0.5", "--index-chunks", "8"],
+        "hmmsearch": [],
+    },
+}
+
+
+# Columns of the tables written by CheckV, used for the empty tables of samples
+# without any contigs
+CHECKV_TABLE_HEADERS = {
+    "quality_summary.tsv": [
+        "contig_id",
+        "contig_length",
+        "provirus",
+        "proviral_length",
+        "gene_count",
+        "viral_genes",
+        "host_genes",
+        "checkv_quality",
+        "miuvig_quality",
+        "completeness",
+        "completeness_method",
+        "contamination",
+        "kmer_freq",
+        "warnings",
+    ],
+    "contamination.tsv": [
+        "contig_id",
+        "contig_length",
+        "total_genes",
+        "viral_genes",
+        "host_genes",
+        "provirus",
+        "proviral_length",
+        "host_length",
+        "region_types",
+        "region_lengths",
+        "region_coords_bp",
+        "region_coords_genes",
+        "region_viral_genes",
+        "region_host_genes",
+    ],
+    "completeness.tsv": [
+        "contig_id",
+        "contig_length",
+        "viral_length",
+        "aai_expected_length",
+        "aai_completeness",
+        "aai_confidence",
+        "aai_error",
+        "aai_num_hits",
+        "aai_top_hit",
+        "aai_id",
+        "aai_af",
+        "hmm_completeness_lower",
+        "hmm_completeness_upper",
+        "hmm_num_hits",
+        "kmer_freq",
+    ],
+    "complete_genomes.tsv": [
+        "contig_id",
+        "contig_length",
+        "kmer_freq",
+        "prediction_type",
+        "confidence_level",
+        "confidence_reason",
+        "repeat_length",
+        "repeat_count",
+        "repeat_n_freq",
+        "repeat_mode_base_freq",
+        "repeat_seq",
+    ],
+}
+
+# CheckV versions (major.minor) whose working directory layout was checked for
+# skipping gene calling with previously predicted proteins
+GENE_SEEDING_CHECKV_VERSIONS = ["1.0", "1.1"]
+
+# Tables needed to rerun the complete_genomes and quality_summary steps
+INTERMEDIATE_TABLES = ["contamination.tsv", "completeness.tsv", "complete_genomes.tsv"]
+
+
+# CheckV does not expose the settings of its DIAMOND and hmmsearch calls,
+# which are resolved through PATH. Put wrappers that add the profile's
+# arguments first in PATH and return the environment to run CheckV in.
+def _get_search_env(wrapper_dir, performance_profile):
+    settings = PERFORMANCE_PROFILES[performance_profile]
+    templates = {
+        # Only blastp accepts the search settings
+        "diamond": (
+            'if [ "$1" = "blastp" ]; then\n'
+            "    shift\n"
+            '    exec {exe} blastp {args} "$@"\n'
+            "fi\n"
+            'exec {exe} "$@"\n'
+        ),
+        # hmmsearch expects the options before the positional arguments
+        "hmmsearch": 'exec {exe} {args} "$@"\n',
+    }
+
+    for program, args in settings.items():
+        if not args:
+            continue
+        # Without the wrapper CheckV would silently run with its defaults
+        executable = shutil.which(program)
+        if executable is None:
+            raise ValueError(
+                f"{program} was not found in PATH, so the "
+                f"'{performance_profile}' performance profile cannot be applied."
+            )
+        wrapper = os.path.join(wrapper_dir, program)
+        with open(wrapper, "w") as fh:
+            fh.write("#!/bin/sh\n")
+            fh.write(
+                templates[program].format(
+                    exe=shlex.quote(executable),
+                    args=" ".join(shlex.quote(arg) for arg in args),
+                )
+            )
+        os.chmod(wrapper, 0o755)
+        print(f"{program} search settings ({performance_profile}): {' '.join(args)}")
+
+    env = os.environ.copy()
+    env["PATH"] = os.pathsep.join([wrapper_dir, env.get("PATH", "")])
+    return env
+
 
 # Create the command for CheckV analysis
-def checkv_end_to_end(tmp, sequences, database, num_threads):
+def checkv_end_to_end(
+    tmp, sequences, database, num_threads, performance_profile="balanced"
+):
     internal_db_name = os.path.join(database.path, os.listdir(database.path)[0])
 
     cmd = [
@@ -35,7 +180,12 @@ def checkv_end_to_end(tmp, sequences, database, num_threads):
     ]
 
     try:
-        run_command(cmd)
+        if not any(PERFORMANCE_PROFILES[performance_profile].values()):
+            run_command(cmd)
+        else:
+            with tempfile.TemporaryDirectory() as wrapper_dir:
+                env = _get_search_env(wrapper_dir, performance_profile)
+                run_command(cmd, env=env)
     except subprocess.CalledProcessError as e:
         raise Exception(
             "An error was encountered while running checkv end_to_end, "
@@ -44,16 +194,104 @@ def checkv_end_to_end(tmp, sequences, database, num_threads):
         )
 
 
-def checkv_analysis(
+# Place previously predicted proteins where CheckV expects them, so that
+# gene calling is skipped and only the searches are run. CheckV has no option
+# for this: its contamination step only calls genes if tmp/proteins.faa does
+# not exist. The proteins are also put into tmp/proteins, as CheckV's gene
+# caller does with one chunk of contigs. The hmmsearch step lists that
+# directory, but searches tmp/proteins.faa.
+def _seed_gene_predictions(tmp, proteins_fp):
+    checkv_tmp = os.path.join(tmp, "tmp")
+    os.makedirs(os.path.join(checkv_tmp, "proteins"), exist_ok=True)
+    shutil.copy(proteins_fp, os.path.join(checkv_tmp, "proteins.faa"))
+    shutil.copy(proteins_fp, os.path.join(checkv_tmp, "proteins", "1.faa"))
+
+
+# Make sure the installed CheckV skips gene calling the way
+# _seed_gene_predictions expects
+def _check_gene_seeding_support():
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        checkv_version = version("checkv")
+    except PackageNotFoundError:
+        checkv_version = "unknown"
+
+    if ".".join(checkv_version.split(".")[:2]) not in GENE_SEEDING_CHECKV_VERSIONS:
+        raise ValueError(
+            f"Predicted genes cannot be reused with CheckV {checkv_version}. "
+            "Reusing them was only checked with CheckV versions "
+            f"{', '.join(GENE_SEEDING_CHECKV_VERSIONS)}; run the analysis "
+            "without genes instead."
+        )
+
+
+# Extract the gene coordinates from the headers of the predicted proteins,
+# e.g. ">contig_1 # 2 # 1021 # 1 # ID=1_1;partial=00;start_type=ATG;..." as
+# written by prodigal-gv, or ">contig_1 # 2 # 1021 # 1 # partial=00"
+def _write_gene_coordinates(proteins_fp, coordinates_fp):
+    with open(proteins_fp) as fin, open(coordinates_fp, "w") as fout:
+        fout.write("gene_id\tcontig_id\tstart\tend\tstrand\tpartial\n")
+        for line in fin:
+            if not line.startswith(">"):
+                continue
+            fields = line[1:].rstrip("\n").split(" # ")
+            gene_id, start, end, strand = fields[:4]
+            attributes = dict(
+                attribute.split("=", 1)
+                for attribute in (fields[4] if len(fields) > 4 else "").split(";")
+                if "=" in attribute
+            )
+            partial = attributes.get("partial", "")
+            contig_id = gene_id.rsplit("_", 1)[0]
+            fout.write(
+                "\t".join([gene_id, contig_id, start, end, strand, partial]) + "\n"
+            )
+
+
+# Write the outputs of a sample without contigs, for which CheckV is not run
+def _write_empty_outputs(out_dir):
+    os.makedirs(os.path.join(out_dir, "tmp"), exist_ok=True)
+    for filename in ["viruses.fna", "proviruses.fna", "tmp/proteins.faa"]:
+        open(os.path.join(out_dir, filename), "w").close()
+    for filename, columns in CHECKV_TABLE_HEADERS.items():
+        with open(os.path.join(out_dir, filename), "w") as fh:
+            fh.write("\t".join(columns) + "\n")
+
+
+# Save the tables needed to rerun the last CheckV steps and, if requested, all
+# other intermediate files (gene calls, DIAMOND and HMM hits, AAI tables)
+def _save_intermediates(out_dir, dst, keep_intermediates):
+    os.makedirs(dst)
+    for filename in INTERMEDIATE_TABLES:
+        shutil.copy(os.path.join(out_dir, filename), dst)
+    if keep_intermediates:
+        # Linked files are not affected when outputs are moved out of out_dir
+        shutil.copytree(
+            os.path.join(out_dir, "tmp"),
+            os.path.join(dst, "tmp"),
+            copy_function=link_or_copy,
+        )
+
+
+def _checkv_analysis(
     sequences: ContigSequencesDirFmt,
     database: CheckVDBDirFmt,
+    genes: CheckVGenesDirFmt = None,
     num_threads: int = 1,
+    performance_profile: str = "balanced",
+    progress_file: str = None,
+    keep_intermediates: bool = False,
+    consolidate_tables: bool = False,
+    run_context: str = None,
 ) -> (
     ContigSequencesDirFmt,
     ContigSequencesDirFmt,
     ViromicsMetadataDirFmt,
     ViromicsMetadataDirFmt,
     ViromicsMetadataDirFmt,
+    CheckVGenesDirFmt,
+    CheckVIntermediatesDirFmt,
 ):
 
     viral_sequences = ContigSequencesDirFmt()
@@ -61,37 +299,98 @@ def checkv_analysis(
     quality_summary = ViromicsMetadataDirFmt()
     contamination = ViromicsMetadataDirFmt()
     completeness = ViromicsMetadataDirFmt()
+    predicted_genes = CheckVGenesDirFmt()
+    intermediates = CheckVIntermediatesDirFmt()
+    known_genes = genes.sample_dict() if genes is not None else {}
 
-    for sample_id, contigs_fp in sequences.sample_dict().items():
-        viral_path = os.path.join(str(viral_sequences), f"{sample_id}_contigs.fa")
-        proviral_path = os.path.join(str(proviral_sequences), f"{sample_id}_contigs.fa")
-        quality_summary_path = os.path.join(
-            str(quality_summary), f"{sample_id}_quality_summary.tsv"
-        )
-        contamination_path = os.path.join(
-            str(contamination), f"{sample_id}_contamination.tsv"
-        )
-        completeness_path = os.path.join(
-            str(completeness), f"{sample_id}_completeness.tsv"
-        )
-        with tempfile.TemporaryDirectory() as tmp:
-            # Execute the "checkv end_to_end" command
-            checkv_end_to_end(tmp, contigs_fp, database, num_threads)
-
-            # Define the filenames and destination paths in a list of tuples
-            files_and_destinations = [
-                ("viruses.fna", viral_path),
-                ("proviruses.fna", proviral_path),
-                ("quality_summary.tsv", quality_summary_path),
-                ("contamination.tsv", contamination_path),
-                ("completeness.tsv", completeness_path),
-            ]
-
-            # Ensure the destination directories exist and move files
-            for filename, dst in files_and_destinations:
-                src = os.path.join(tmp, filename)
-                os.makedirs(os.path.dirname(dst), exist_ok=True)
-                shutil.move(src, dst)
+    samples = sequences.sample_dict()
+    # The sizes of the samples are used to skip the empty ones and to estimate
+    # the remaining run time. The samples were already checked by the
+    # pipeline, so they are only counted here.
+    sample_stats = {
+        sample_id: count_fasta(contigs_fp) for sample_id, contigs_fp in samples.items()
+    }
+    if known_genes:
+        _check_gene_seeding_support()
+
+    # Set by the pipeline, so that the progress reports cover the whole run
+    if run_context is not None:
+        run_context = json.loads(run_context)
+
+    with ProgressReporter(
+        sample_stats, progress_file, run_context=run_context
+    ) as progress:
+        for sample_id, contigs_fp in samples.items():
+            progress.sample_started(sample_id)
+            viral_path = os.path.join(str(viral_sequences), f"{sample_id}_contigs.fa")
+            proviral_path = os.path.join(
+                str(proviral_sequences), f"{sample_id}_contigs.fa"
+            )
+            quality_summary_path = os.path.join(
+                str(quality_summary), f"{sample_id}_quality_summary.tsv"
+            )
+            contamination_path = os.path.join(
+                str(contamination), f"{sample_id}_contamination.tsv"
+            )
+            completeness_path = os.path.join(
+                str(completeness), f"{sample_id}_completeness.tsv"
+            )
+            proteins_path = os.path.join(
+                str(predicted_genes), f"{sample_id}_proteins.faa"
+            )
+            with tempfile.TemporaryDirectory() as tmp:
+                if sample_id in known_genes:
+                    _seed_gene_predictions(tmp, known_genes[sample_id])
+
+                if sample_stats[sample_id].contigs == 0:
+                    _write_empty_outputs(tmp)
+                else:
+                    # Execute the "checkv end_to_end" command
+                    checkv_end_to_end(
+                        tmp, contigs_fp, database, num_threads, performance_profile
+                    )
+
+                _save_intermediates(
+                    tmp,
+                    os.path.join(str(intermediates), sample_id),
+                    keep_intermediates,
+                )
+
+                # Define the filenames and destination paths in a list of tuples
+                files_and_destinations = [
+                    ("viruses.fna", viral_path),
+                    ("proviruses.fna", proviral_path),
+                    ("quality_summary.tsv", quality_summary_path),
+                    ("contamination.tsv", contamination_path),
+                    ("completeness.tsv", completeness_path),
+                    (os.path.join("tmp", "proteins.faa"), proteins_path),
+                ]
+
+                # Ensure the destination directories exist and move files
+                for filename, dst in files_and_destinations:
+                    src = os.path.join(tmp, filename)
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.move(src, dst)
+
+                _write_gene_coordinates(
+                    proteins_path,
+                    os.path.join(
+                        str(predicted_genes), f"{sample_id}_gene_coordinates.tsv"
+                    ),
+                )
+
+            if consolidate_tables:
+                for table_path, table in [
+                    (quality_summary_path, quality_summary),
+                    (contamination_path, contamination),
+                    (completeness_path, completeness),
+                ]:
+                    append_table(
+                        table_path,
+                        os.path.join(str(table), table.CONSOLIDATED_TABLE),
+                        sample_id,
+                    )
+            progress.sample_done(sample_id)
 
     return (
         viral_sequences,
@@ -99,4 +398,77 @@ def checkv_analysis(
         quality_summary,
         contamination,
         completeness,
+        predicted_genes,
+        intermediates,
+    )
+
+
+def checkv_analysis(
+    ctx,
+    sequences,
+    database,
+    genes=None,
+    num_threads=1,
+    performance_profile="balanced",
+    progress_file=None,
+    keep_intermediates=False,
+    consolidate_tables=False,
+    num_partitions=None,
+):
+    kwargs = {
+        k: v
+        for k, v in locals().items()
+        if k not in ["sequences", "database", "ctx", "num_partitions"]
+    }
+
+    _checkv_analysis = ctx.get_action("viromics", "_checkv_analysis")
+    partition_contigs = ctx.get_action("viromics", "partition_contigs")
+    collate_contigs = ctx.get_action("viromics", "collate_contigs")
+    collate_metadata = ctx.get_action("viromics", "collate_viromics_metadata")
+    collate_genes = ctx.get_action("viromics", "collate_checkv_genes")
+    collate_intermediates = ctx.get_action("viromics", "collate_checkv_intermediates")
+
+    # Report all problems with the input before any CheckV job is started
+    known_genes = {}
+    if genes is not None:
+        known_genes = genes.view(CheckVGenesDirFmt).sample_dict()
+        _check_gene_seeding_support()
+    sample_stats = preflight_check(
+        sequences.view(ContigSequencesDirFmt).sample_dict(), num_threads, known_genes
+    )
+
+    # The partitions report their progress against the totals of the run
+    run_context = new_run_context(sample_stats)
+    ProgressReporter(sample_stats, progress_file, run_context=run_context).report(
+        "start"
+    )
+
+    (partitioned_sequences,) = partition_contigs(sequences, num_partitions)
+
+    results = []
+    for i, partition in enumerate(partitioned_sequences.values(), 1):
+        partition_context = json.dumps({**run_context, "partition_id": str(i)})
+        results.append(
+            _checkv_analysis(
+                partition, database, run_context=partition_context, **kwargs
+            )
+        )
+
+    # Collate every output across the partitions, keeping the output order
+    (viruses,) = collate_contigs([result[0] for result in results])
+    (proviruses,) = collate_contigs([result[1] for result in results])
+    (quality_summary,) = collate_metadata([result[2] for result in results])
+    (contamination,) = collate_metadata([result[3] for result in results])
+    (completeness,) = collate_metadata([result[4] for result in results])
+    (predicted_genes,) = collate_genes([result[5] for result in results])
+    (intermediates,) = collate_intermediates([result[6] for result in results])
+
+    return (
+        viruses,
+        proviruses,
+        quality_summary,
+        contamination,
+        completeness,
+        predicted_genes,
+        intermediates,
     )
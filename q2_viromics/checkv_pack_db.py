@@ -0,0 +1,14 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from q2_viromics.types._format import CheckVDBPackedDirFmt
+
+
+# The database is packed by the CheckVDBDirFmt -> CheckVDBPackedDirFmt
+# transformer when the input is loaded
+def checkv_pack_db(database: CheckVDBPackedDirFmt) -> CheckVDBPackedDirFmt:
+    return database
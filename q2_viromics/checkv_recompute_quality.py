@@ -0,0 +1,102 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+import subprocess
+import tempfile
+
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+
+from q2_viromics._preflight import count_fasta
+from q2_viromics._utils import run_command
+from q2_viromics.checkv_analysis import CHECKV_TABLE_HEADERS
+from q2_viromics.types._format import (
+    CheckVIntermediatesDirFmt,
+    ViromicsMetadataDirFmt,
+)
+
+
+# Run one step of CheckV on the contigs of a sample
+def _run_checkv_step(step, sequences_fp, out_dir, options=()):
+    cmd = ["checkv", step, str(sequences_fp), str(out_dir), *options]
+
+    try:
+        run_command(cmd)
+    except subprocess.CalledProcessError as e:
+        raise Exception(
+            f"An error was encountered while running checkv {step}, "
+            f"(return code {e.returncode}), please inspect "
+            "stdout and stderr to learn more."
+        )
+
+
+# Rerun the complete_genomes and quality_summary steps of CheckV from the
+# saved contamination and completeness tables. Only the thresholds that are
+# set are passed on, so that all others keep the installed CheckV's defaults.
+def checkv_recompute_quality(
+    sequences: ContigSequencesDirFmt,
+    intermediates: CheckVIntermediatesDirFmt,
+    tr_min_len: int = None,
+    tr_max_count: int = None,
+    tr_max_ambig: float = None,
+    tr_max_basefreq: float = None,
+    kmer_max_freq: float = None,
+) -> (ViromicsMetadataDirFmt, ViromicsMetadataDirFmt):
+    samples = sequences.sample_dict()
+    saved_samples = intermediates.sample_dict()
+
+    missing = sorted(set(samples) - set(saved_samples))
+    if missing:
+        raise ValueError(
+            "The CheckV intermediates are missing for the following samples: "
+            f"{', '.join(missing)}."
+        )
+
+    complete_genomes_options = []
+    for option, value in [
+        ("--tr_min_len", tr_min_len),
+        ("--tr_max_count", tr_max_count),
+        ("--tr_max_ambig", tr_max_ambig),
+        ("--tr_max_basefreq", tr_max_basefreq),
+        ("--kmer_max_freq", kmer_max_freq),
+    ]:
+        if value is not None:
+            complete_genomes_options.extend([option, str(value)])
+
+    quality_summary = ViromicsMetadataDirFmt()
+    complete_genomes = ViromicsMetadataDirFmt()
+    for sample_id, contigs_fp in samples.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            # CheckV writes its outputs next to the tables, so they are
+            # copied rather than linked
+            for filename in ["contamination.tsv", "completeness.tsv"]:
+                shutil.copy(os.path.join(saved_samples[sample_id], filename), tmp)
+
+            if count_fasta(contigs_fp).contigs == 0:
+                # CheckV stops without any output on empty input
+                for filename in ["complete_genomes.tsv", "quality_summary.tsv"]:
+                    with open(os.path.join(tmp, filename), "w") as fh:
+                        fh.write("\t".join(CHECKV_TABLE_HEADERS[filename]) + "\n")
+            else:
+                _run_checkv_step(
+                    "complete_genomes", contigs_fp, tmp, complete_genomes_options
+                )
+                _run_checkv_step("quality_summary", contigs_fp, tmp)
+
+            shutil.move(
+                os.path.join(tmp, "quality_summary.tsv"),
+                os.path.join(str(quality_summary), f"{sample_id}_quality_summary.tsv"),
+            )
+            shutil.move(
+                os.path.join(tmp, "complete_genomes.tsv"),
+                os.path.join(
+                    str(complete_genomes), f"{sample_id}_complete_genomes.tsv"
+                ),
+            )
+
+    return quality_summary, complete_genomes
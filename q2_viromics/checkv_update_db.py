@@ -0,0 +1,241 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from q2_types.feature_data import DNAFASTAFormat
+
+from q2_viromics._utils import link_or_copy, run_command
+from q2_viromics.types._format import CheckVDBDirFmt
+
+# Files of the genome database that change when genomes are added. All other
+# files, including the HMM database, are reused as they are.
+UPDATED_FILES = [
+    os.path.join("genome_db", "checkv_reps.faa"),
+    os.path.join("genome_db", "checkv_reps.fna"),
+    os.path.join("genome_db", "checkv_reps.tsv"),
+    os.path.join("genome_db", "checkv_reps.dmnd"),
+]
+
+
+# Read the IDs and lengths of the genomes in a FASTA file
+def _read_genome_lengths(genomes_fp):
+    lengths = {}
+    genome_id = None
+    with open(genomes_fp) as fh:
+        for line in fh:
+            if line.startswith(">"):
+                fields = line[1:].split(maxsplit=1)
+                genome_id = fields[0] if fields else ""
+                if genome_id in lengths:
+                    raise ValueError(
+                        f"The genome ID {genome_id} is present more than once "
+                        "in the new genomes."
+                    )
+                lengths[genome_id] = 0
+            elif genome_id is not None:
+                lengths[genome_id] += len(line.strip())
+    return lengths
+
+
+# Read the IDs of the genomes already in the database
+def _read_reference_ids(reps_tsv):
+    with open(reps_tsv) as fh:
+        next(fh)
+        return {line.split("\t", 1)[0] for line in fh}
+
+
+# Recreate the database with links to the files that do not change. The
+# linked files are never written to, so the source database stays unchanged.
+def _link_unchanged_files(src_db, dst_db):
+    for root, _, files in os.walk(src_db):
+        dst_root = os.path.join(dst_db, os.path.relpath(root, src_db))
+        os.makedirs(dst_root, exist_ok=True)
+        for file_name in files:
+            src = os.path.join(root, file_name)
+            if os.path.relpath(src, src_db) in UPDATED_FILES:
+                continue
+            link_or_copy(src, os.path.join(dst_root, file_name))
+
+
+# Write the content of all source files into a new file
+def _concatenate(sources, dst):
+    with open(dst, "wb") as fout:
+        for src in sources:
+            with open(src, "rb") as fin:
+                shutil.copyfileobj(fin, fout, 16 * 1024 * 1024)
+                # Make sure the next file starts on a new line
+                if fin.tell() > 0:
+                    fin.seek(-1, os.SEEK_END)
+                    if fin.read(1) != b"\n":
+                        fout.write(b"\n")
+
+
+# Split a FASTA file into at most num_chunks files with about the same number
+# of records, preserving their order
+def _split_fasta(fasta_fp, out_dir, num_records, num_chunks):
+    chunk_size = max(-(-num_records // num_chunks), 1)
+    chunk_fps = []
+    count, fout = 0, None
+    with open(fasta_fp) as fin:
+        for line in fin:
+            if line.startswith(">"):
+                if count % chunk_size == 0:
+                    if fout is not None:
+                        fout.close()
+                    chunk_fps.append(
+                        os.path.join(out_dir, f"genomes_{len(chunk_fps) + 1}.fna")
+                    )
+                    fout = open(chunk_fps[-1], "w")
+                count += 1
+            if fout is not None:
+                fout.write(line)
+    if fout is not None:
+        fout.close()
+    return chunk_fps
+
+
+# Predict the genes of one chunk of genomes with prodigal-gv
+def _run_prodigal(genomes_fp):
+    proteins_fp = os.path.splitext(genomes_fp)[0] + ".faa"
+    cmd = [
+        "prodigal-gv",
+        "-p",
+        "meta",
+        "-m",
+        "-q",
+        "-i",
+        genomes_fp,
+        "-a",
+        proteins_fp,
+        "-o",
+        os.devnull,
+    ]
+
+    try:
+        run_command(cmd)
+    except subprocess.CalledProcessError as e:
+        raise Exception(
+            "An error was encountered while running prodigal-gv, "
+            f"(return code {e.returncode}), please inspect "
+            "stdout and stderr to learn more."
+        )
+    return proteins_fp
+
+
+# Predict the genes of the new genomes with the settings CheckV uses for its
+# own gene calling (metagenomic mode, no genes across runs of Ns), so that the
+# proteins match those of the stock database. The genomes are split into one
+# chunk per thread.
+def _call_genes(genomes_fp, out_dir, num_genomes, num_threads):
+    chunk_fps = _split_fasta(genomes_fp, out_dir, num_genomes, num_threads)
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        chunk_proteins = list(executor.map(_run_prodigal, chunk_fps))
+
+    proteins_fp = os.path.join(out_dir, "proteins.faa")
+    _concatenate(chunk_proteins, proteins_fp)
+    return proteins_fp
+
+
+# Build the DIAMOND database from the proteins of all genomes
+def _make_diamond_db(proteins_fp, dmnd_fp, num_threads):
+    cmd = [
+        "diamond",
+        "makedb",
+        "--in",
+        proteins_fp,
+        "--db",
+        dmnd_fp,
+        "--threads",
+        str(num_threads),
+    ]
+
+    try:
+        run_command(cmd)
+    except subprocess.CalledProcessError as e:
+        raise Exception(
+            "An error was encountered while running DIAMOND makedb, "
+            f"(return code {e.returncode}), please inspect "
+            "stdout and stderr to learn more."
+        )
+
+
+# Add new genomes to a CheckV database
+def checkv_update_db(
+    database: CheckVDBDirFmt, genomes: DNAFASTAFormat, num_threads: int = 1
+) -> CheckVDBDirFmt:
+    db_name = os.listdir(str(database))[0]
+    src_db = os.path.join(str(database), db_name)
+
+    # The DIAMOND database is rebuilt, all other updated files are extended
+    missing_files = [
+        fp
+        for fp in UPDATED_FILES
+        if not fp.endswith(".dmnd") and not os.path.isfile(os.path.join(src_db, fp))
+    ]
+    if missing_files:
+        raise ValueError(
+            "The CheckV database cannot be updated, as the following files are "
+            f"missing from it: {', '.join(missing_files)}."
+        )
+
+    genome_lengths = _read_genome_lengths(str(genomes))
+    duplicated_ids = sorted(
+        set(genome_lengths)
+        & _read_reference_ids(os.path.join(src_db, "genome_db", "checkv_reps.tsv"))
+    )
+    if duplicated_ids:
+        raise ValueError(
+            "The following genomes are already in the CheckV database: "
+            f"{', '.join(duplicated_ids)}."
+        )
+
+    updated_database = CheckVDBDirFmt()
+    dst_db = os.path.join(str(updated_database), db_name)
+    _link_unchanged_files(src_db, dst_db)
+
+    src_genome_db = os.path.join(src_db, "genome_db")
+    dst_genome_db = os.path.join(dst_db, "genome_db")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Only the new genomes need gene calling
+        proteins_fp = _call_genes(str(genomes), tmp, len(genome_lengths), num_threads)
+        _concatenate(
+            [os.path.join(src_genome_db, "checkv_reps.faa"), proteins_fp],
+            os.path.join(dst_genome_db, "checkv_reps.faa"),
+        )
+
+        # Build the DIAMOND database while the other files are written
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            makedb = executor.submit(
+                _make_diamond_db,
+                os.path.join(dst_genome_db, "checkv_reps.faa"),
+                os.path.join(dst_genome_db, "checkv_reps.dmnd"),
+                num_threads,
+            )
+
+            _concatenate(
+                [os.path.join(src_genome_db, "checkv_reps.fna"), str(genomes)],
+                os.path.join(dst_genome_db, "checkv_reps.fna"),
+            )
+
+            # New genomes are complete genomes, which CheckV lists as circular
+            new_rows_fp = os.path.join(tmp, "checkv_reps.tsv")
+            with open(new_rows_fp, "w") as fh:
+                for genome_id, length in genome_lengths.items():
+                    fh.write(f"{genome_id}\tcircular\t{length}\n")
+            _concatenate(
+                [os.path.join(src_genome_db, "checkv_reps.tsv"), new_rows_fp],
+                os.path.join(dst_genome_db, "checkv_reps.tsv"),
+            )
+
+            makedb.result()
+
+    return updated_database
@@ -0,0 +1,207 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import mmap
+import os
+
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+
+from q2_viromics._utils import get_sample_tables
+from q2_viromics.types._format import (
+    CheckVContigIndexDirFmt,
+    CheckVContigIndexFormat,
+    ViromicsMetadataDirFmt,
+)
+
+TABLES = ["quality_summary", "contamination", "completeness"]
+SEQUENCES = ["viruses", "proviruses"]
+
+
+# Record the row number, byte offset and byte length of every TSV row
+def _index_tsv(fp):
+    entries = {}
+    with open(fp, "rb") as fh:
+        offset = len(fh.readline())
+        for row, line in enumerate(fh):
+            contig_id = line.split(b"\t", 1)[0].decode()
+            entries[contig_id] = (row, offset, len(line))
+            offset += len(line)
+    return entries
+
+
+# Record the byte offset and byte length of the FASTA records of every contig.
+# Proviral fragments ({contig_id}_{n}) of the same contig are consecutive in
+# the CheckV output and are indexed as one block.
+def _index_fasta(fp, contig_ids):
+    entries = {}
+    current, start, offset = None, 0, 0
+    with open(fp, "rb") as fh:
+        for line in fh:
+            if line.startswith(b">"):
+                fields = line[1:].split(maxsplit=1)
+                record_id = fields[0].decode() if fields else ""
+                if record_id not in contig_ids:
+                    record_id = record_id.rsplit("_", 1)[0]
+                if record_id != current:
+                    if current is not None:
+                        entries[current] = (start, offset - start)
+                    current, start = record_id, offset
+            offset += len(line)
+    if current is not None:
+        entries[current] = (start, offset - start)
+    return entries
+
+
+def index_checkv_results(
+    quality_summary: ViromicsMetadataDirFmt,
+    contamination: ViromicsMetadataDirFmt = None,
+    completeness: ViromicsMetadataDirFmt = None,
+    viruses: ContigSequencesDirFmt = None,
+    proviruses: ContigSequencesDirFmt = None,
+) -> CheckVContigIndexDirFmt:
+    tables = {
+        "quality_summary": quality_summary,
+        "contamination": contamination,
+        "completeness": completeness,
+    }
+    sequences = {"viruses": viruses, "proviruses": proviruses}
+
+    index = CheckVContigIndexDirFmt()
+    with open(os.path.join(str(index), "contig_index.tsv"), "w") as out:
+        out.write("\t".join(CheckVContigIndexFormat.COLUMNS) + "\n")
+
+        for sample_id, quality_fp in get_sample_tables(
+            quality_summary, "quality_summary"
+        ).items():
+            entries = {"quality_summary": _index_tsv(quality_fp)}
+            contig_ids = set(entries["quality_summary"])
+
+            for table in TABLES[1:]:
+                if tables[table] is None:
+                    continue
+                fp = os.path.join(str(tables[table]), f"{sample_id}_{table}.tsv")
+                if os.path.exists(fp):
+                    entries[table] = _index_tsv(fp)
+
+            for name, seqs in sequences.items():
+                if seqs is None:
+                    continue
+                fp = os.path.join(str(seqs), f"{sample_id}_contigs.fa")
+                if os.path.exists(fp):
+                    entries[name] = _index_fasta(fp, contig_ids)
+
+            for contig_id in entries["quality_summary"]:
+                fields = [contig_id, sample_id]
+                for table in TABLES:
+                    fields.extend(entries.get(table, {}).get(contig_id, (-1,) * 3))
+                for name in SEQUENCES:
+                    fields.extend(entries.get(name, {}).get(contig_id, (-1,) * 2))
+                out.write("\t".join(str(field) for field in fields) + "\n")
+
+    return index
+
+
+class ContigLookup:
+    """Look up the CheckV results of single contigs using a contig index.
+
+    Only the index is loaded into memory. The records of each contig are
+    read from memory-mapped CheckV output files at the offsets stored in the
+    index, so no output file is scanned.
+
+    Parameters
+    ----------
+    index : CheckVContigIndexDirFmt or str
+        Contig index created by index-checkv-results.
+    quality_summary, contamination, completeness : ViromicsMetadataDirFmt or str
+        The CheckV tables the index was created from.
+    viruses, proviruses : ContigSequencesDirFmt or str
+        The CheckV sequences the index was created from.
+    """
+
+    def __init__(
+        self,
+        index,
+        quality_summary=None,
+        contamination=None,
+        completeness=None,
+        viruses=None,
+        proviruses=None,
+    ):
+        import pandas as pd
+
+        index_fp = os.path.join(str(index), "contig_index.tsv")
+        self._index = pd.read_csv(
+            index_fp, sep="\t", dtype={"contig_id": str, "sample_id": str}
+        ).set_index("contig_id")
+        self._sources = {
+            "quality_summary": quality_summary,
+            "contamination": contamination,
+            "completeness": completeness,
+            "viruses": viruses,
+            "proviruses": proviruses,
+        }
+        self._maps = {}
+        self._headers = {}
+
+    def _path(self, name, sample_id):
+        if name in TABLES:
+            file_name = f"{sample_id}_{name}.tsv"
+        else:
+            file_name = f"{sample_id}_contigs.fa"
+        return os.path.join(str(self._sources[name]), file_name)
+
+    def _read(self, fp, offset, length):
+        if fp not in self._maps:
+            with open(fp, "rb") as fh:
+                self._maps[fp] = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[fp][offset : offset + length].decode()
+
+    def _header(self, fp):
+        if fp not in self._headers:
+            with open(fp) as fh:
+                self._headers[fp] = fh.readline().rstrip("\n").split("\t")
+        return self._headers[fp]
+
+    def lookup(self, contig_id):
+        """Return the CheckV records of a contig in every sample it occurs in.
+
+        Each record is a dictionary with the sample ID, one dictionary of
+        column values per CheckV table and the FASTA records of the viral
+        and proviral sequences. Outputs that were not indexed or not passed
+        to ContigLookup are None.
+        """
+        if contig_id not in self._index.index:
+            raise KeyError(f"Contig {contig_id} is not present in the index.")
+
+        records = []
+        for _, entry in self._index.loc[[contig_id]].iterrows():
+            record = {"contig_id": contig_id, "sample_id": entry["sample_id"]}
+            for name in TABLES + SEQUENCES:
+                offset = entry[f"{name}_offset"]
+                if self._sources[name] is None or offset < 0:
+                    record[name] = None
+                    continue
+                fp = self._path(name, entry["sample_id"])
+                data = self._read(fp, offset, entry[f"{name}_length"])
+                if name in TABLES:
+                    values = data.rstrip("\n").split("\t")
+                    record[name] = dict(zip(self._header(fp), values))
+                else:
+                    record[name] = data
+            records.append(record)
+        return records
+
+    def close(self):
+        for mm in self._maps.values():
+            mm.close()
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,98 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+
+from q2_viromics._utils import get_sample_tables
+from q2_viromics.types._format import ViromicsMetadataDirFmt
+
+QUALITY_TIERS = [
+    "Complete",
+    "High-quality",
+    "Medium-quality",
+    "Low-quality",
+    "Not-determined",
+]
+
+
+# Select the IDs of the contigs that pass all thresholds
+def _select_contig_ids(
+    quality_summary_fp, quality_tiers, min_completeness, max_contamination
+):
+    import pandas as pd
+
+    df = pd.read_csv(
+        quality_summary_fp,
+        sep="\t",
+        usecols=["contig_id", "checkv_quality", "completeness", "contamination"],
+        dtype={"contig_id": str, "checkv_quality": str},
+    )
+
+    mask = df["checkv_quality"].isin(quality_tiers)
+    if min_completeness is not None:
+        mask &= df["completeness"] >= min_completeness
+    if max_contamination is not None:
+        mask &= df["contamination"] <= max_contamination
+
+    return set(df.loc[mask, "contig_id"]), set(df["contig_id"])
+
+
+# Copy the selected records line by line so that memory use does not depend
+# on the size of the FASTA file
+def _stream_filter_fasta(src, dst, selected_ids, all_ids):
+    keep = False
+    with open(src) as fin, open(dst, "w") as fout:
+        for line in fin:
+            if line.startswith(">"):
+                fields = line[1:].split(maxsplit=1)
+                record_id = fields[0] if fields else ""
+                # Proviral fragments are named {contig_id}_{n} by CheckV
+                if record_id not in all_ids:
+                    record_id = record_id.rsplit("_", 1)[0]
+                keep = record_id in selected_ids
+            if keep:
+                fout.write(line)
+
+
+def filter_viral_contigs(
+    sequences: ContigSequencesDirFmt,
+    quality_summary: ViromicsMetadataDirFmt,
+    quality_tiers: list = None,
+    min_completeness: float = None,
+    max_contamination: float = None,
+) -> ContigSequencesDirFmt:
+    if quality_tiers is None:
+        quality_tiers = ["Complete", "High-quality"]
+
+    quality_summaries = get_sample_tables(quality_summary, "quality_summary")
+    samples = sequences.sample_dict()
+
+    missing = sorted(set(samples) - set(quality_summaries))
+    if missing:
+        raise ValueError(
+            "The quality summary is missing for the following samples: "
+            f"{', '.join(missing)}."
+        )
+
+    filtered_sequences = ContigSequencesDirFmt()
+    for sample_id, contigs_fp in samples.items():
+        selected_ids, all_ids = _select_contig_ids(
+            quality_summaries[sample_id],
+            quality_tiers,
+            min_completeness,
+            max_contamination,
+        )
+        _stream_filter_fasta(
+            contigs_fp,
+            os.path.join(str(filtered_sequences), f"{sample_id}_contigs.fa"),
+            selected_ids,
+            all_ids,
+        )
+
+    return filtered_sequences
@@ -0,0 +1,128 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+import warnings
+
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+
+from q2_viromics._utils import append_table
+from q2_viromics.types._format import (
+    CheckVGenesDirFmt,
+    CheckVIntermediatesDirFmt,
+    ViromicsMetadataDirFmt,
+)
+
+
+# Make sure the number of partitions does not exceed the number of samples
+def _validate_num_partitions(num_samples, num_partitions):
+    if num_partitions is None:
+        return num_samples
+    elif num_partitions > num_samples:
+        warnings.warn(
+            "You have requested a number of partitions "
+            f"({num_partitions}) that is greater than your number "
+            f"of samples ({num_samples}). Your data will be "
+            f"partitioned by sample into {num_samples} partitions."
+        )
+        return num_samples
+    return num_partitions
+
+
+# Split a list into n chunks of (almost) equal size, preserving order
+def _split_evenly(items, n):
+    size, remainder = divmod(len(items), n)
+    chunks, start = [], 0
+    for i in range(n):
+        end = start + size + (1 if i < remainder else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+# Copy every file and directory of the source directories into the
+# destination directory, except for the excluded ones
+def _copy_files(sources, destination, exclude=()):
+    for source in sources:
+        for file_name in sorted(os.listdir(str(source))):
+            if file_name in exclude:
+                continue
+            dst = os.path.join(str(destination), file_name)
+            if os.path.exists(dst):
+                raise ValueError(
+                    f"The file {file_name} is present in more than one of the "
+                    "artifacts being collated. Sample IDs must be unique "
+                    "across partitions."
+                )
+            src = os.path.join(str(source), file_name)
+            if os.path.isdir(src):
+                shutil.copytree(src, dst)
+            else:
+                shutil.copy(src, dst)
+
+
+# Partition the contigs into collections of samples
+def partition_contigs(
+    sequences: ContigSequencesDirFmt, num_partitions: int = None
+) -> ContigSequencesDirFmt:
+    samples = sorted(sequences.sample_dict().items())
+    num_partitions = _validate_num_partitions(len(samples), num_partitions)
+
+    partitioned_sequences = {}
+    for i, chunk in enumerate(_split_evenly(samples, num_partitions), 1):
+        result = ContigSequencesDirFmt()
+        for _, contigs_fp in chunk:
+            shutil.copy(
+                contigs_fp,
+                os.path.join(str(result), os.path.basename(contigs_fp)),
+            )
+
+        # Name the partition after its sample if there is only one
+        key = chunk[0][0] if num_partitions == len(samples) else i
+        partitioned_sequences[key] = result
+
+    return partitioned_sequences
+
+
+# Collate partitioned contigs back into a single artifact
+def collate_contigs(sequences: ContigSequencesDirFmt) -> ContigSequencesDirFmt:
+    collated_sequences = ContigSequencesDirFmt()
+    _copy_files(sequences, collated_sequences)
+    return collated_sequences
+
+
+# Collate partitioned viromics metadata back into a single artifact
+def collate_viromics_metadata(
+    metadata: ViromicsMetadataDirFmt,
+) -> ViromicsMetadataDirFmt:
+    collated_metadata = ViromicsMetadataDirFmt()
+    consolidated = ViromicsMetadataDirFmt.CONSOLIDATED_TABLE
+    _copy_files(metadata, collated_metadata, exclude=[consolidated])
+
+    # The consolidated tables of the partitions are joined in partition order
+    for part in metadata:
+        part_fp = os.path.join(str(part), consolidated)
+        if os.path.isfile(part_fp):
+            append_table(part_fp, os.path.join(str(collated_metadata), consolidated))
+    return collated_metadata
+
+
+# Collate partitioned gene predictions back into a single artifact
+def collate_checkv_genes(genes: CheckVGenesDirFmt) -> CheckVGenesDirFmt:
+    collated_genes = CheckVGenesDirFmt()
+    _copy_files(genes, collated_genes)
+    return collated_genes
+
+
+# Collate partitioned CheckV intermediates back into a single artifact
+def collate_checkv_intermediates(
+    intermediates: CheckVIntermediatesDirFmt,
+) -> CheckVIntermediatesDirFmt:
+    collated_intermediates = CheckVIntermediatesDirFmt()
+    _copy_files(intermediates, collated_intermediates)
+    return collated_intermediates
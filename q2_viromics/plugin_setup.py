@@ -7,19 +7,64 @@
 # ----------------------------------------------------------------------------
 import importlib
 
+from q2_types.feature_data import FeatureData, Sequence
 from q2_types.per_sample_sequences import Contigs
 from q2_types.sample_data import SampleData
-from qiime2.plugin import Citations, Int, Plugin, Range
+from qiime2.plugin import (
+    Bool,
+    Choices,
+    Citations,
+    Collection,
+    Float,
+    Int,
+    List,
+    Plugin,
+    Range,
+    Str,
+)
 
 import q2_viromics
 
-from q2_viromics.checkv_analysis import checkv_analysis
+from q2_viromics.checkv_analysis import (
+    PERFORMANCE_PROFILES,
+    _checkv_analysis,
+    checkv_analysis,
+)
 from q2_viromics.checkv_fetch_db import checkv_fetch_db
+from q2_viromics.checkv_pack_db import checkv_pack_db
+from q2_viromics.checkv_recompute_quality import checkv_recompute_quality
+from q2_viromics.checkv_update_db import checkv_update_db
+from q2_viromics.contig_index import index_checkv_results
+from q2_viromics.filter_viral_contigs import QUALITY_TIERS, filter_viral_contigs
+from q2_viromics.partition import (
+    collate_checkv_genes,
+    collate_checkv_intermediates,
+    collate_contigs,
+    collate_viromics_metadata,
+    partition_contigs,
+)
+from q2_viromics.summarize_checkv import summarize_checkv
 from q2_viromics.types._format import (
+    CheckVContigIndexDirFmt,
+    CheckVContigIndexFormat,
+    CheckVDBArchiveFormat,
     CheckVDBDirFmt,
+    CheckVDBPackedDirFmt,
+    CheckVGenesDirFmt,
+    CheckVIntermediatesDirFmt,
+    CheckVProteinsFormat,
+    GeneCoordinatesFormat,
     ViromicsMetadataDirFmt,
+    ViromicsMetadataFormat,
+)
+from q2_viromics.types._type import (
+    CheckVContigIndex,
+    CheckVDB,
+    CheckVDBPacked,
+    CheckVGenes,
+    CheckVIntermediates,
+    ViromicsMetadata,
 )
-from q2_viromics.types._type import CheckVDB, ViromicsMetadata
 
 citations = Citations.load("citations.bib", package="q2_viromics")
 
@@ -37,10 +82,26 @@ plugin = Plugin(
 
 plugin.register_formats(
     CheckVDBDirFmt,
+    ViromicsMetadataFormat,
     ViromicsMetadataDirFmt,
+    CheckVContigIndexFormat,
+    CheckVContigIndexDirFmt,
+    CheckVProteinsFormat,
+    GeneCoordinatesFormat,
+    CheckVGenesDirFmt,
+    CheckVDBArchiveFormat,
+    CheckVDBPackedDirFmt,
+    CheckVIntermediatesDirFmt,
 )
 
-plugin.register_semantic_types(CheckVDB, ViromicsMetadata)
+plugin.register_semantic_types(
+    CheckVDB,
+    ViromicsMetadata,
+    CheckVContigIndex,
+    CheckVGenes,
+    CheckVDBPacked,
+    CheckVIntermediates,
+)
 
 plugin.register_artifact_class(
     CheckVDB,
@@ -48,11 +109,33 @@ plugin.register_artifact_class(
     description=("CheckV database."),
 )
 
+plugin.register_artifact_class(
+    CheckVDBPacked,
+    directory_format=CheckVDBPackedDirFmt,
+    description=("CheckV database packed into a single archive."),
+)
+
 plugin.register_semantic_type_to_format(
     SampleData[ViromicsMetadata],
     directory_format=ViromicsMetadataDirFmt,
 )
 
+plugin.register_semantic_type_to_format(
+    SampleData[CheckVGenes],
+    directory_format=CheckVGenesDirFmt,
+)
+
+plugin.register_semantic_type_to_format(
+    SampleData[CheckVIntermediates],
+    directory_format=CheckVIntermediatesDirFmt,
+)
+
+plugin.register_artifact_class(
+    CheckVContigIndex,
+    directory_format=CheckVContigIndexDirFmt,
+    description=("Index of the CheckV results of every contig."),
+)
+
 plugin.methods.register_function(
     function=checkv_fetch_db,
     inputs={},
@@ -70,39 +153,366 @@ plugin.methods.register_function(
 )
 
 plugin.methods.register_function(
+    function=checkv_pack_db,
+    inputs={"database": CheckVDB},
+    parameters={},
+    input_descriptions={"database": "CheckV database."},
+    outputs=[("packed_database", CheckVDBPacked)],
+    output_descriptions={
+        "packed_database": "CheckV database packed into a single archive."
+    },
+    name="Pack CheckV database",
+    description=(
+        "Pack a CheckV database into a single compressed archive, which is "
+        "faster to import, export and checksum than the thousands of files "
+        "of the database. checkv-analysis extracts the archive once into a "
+        "local cache (~/.cache/q2-viromics by default, can be changed with "
+        "the Q2_VIROMICS_CACHE_DIR environment variable) and reuses it."
+    ),
+    citations=[citations["CheckV"]],
+)
+
+plugin.methods.register_function(
+    function=checkv_update_db,
+    inputs={"database": CheckVDB | CheckVDBPacked, "genomes": FeatureData[Sequence]},
+    parameters={"num_threads": Int % Range(1, None)},
+    input_descriptions={
+        "database": "CheckV database to add the genomes to.",
+        "genomes": "Complete viral genomes to add to the database. Their IDs "
+        "must not be present in the database yet.",
+    },
+    parameter_descriptions={
+        "num_threads": "Number of threads to use for gene calling and "
+        "DIAMOND makedb."
+    },
+    outputs=[("updated_database", CheckVDB)],
+    output_descriptions={
+        "updated_database": "CheckV database including the new genomes."
+    },
+    name="Add genomes to a CheckV database",
+    description=(
+        "Add complete viral genomes to a CheckV database. Genes are only "
+        "called on the new genomes, the DIAMOND database is rebuilt from the "
+        "proteins of all genomes while the other files are updated, and the "
+        "parts of the database that do not change, such as the HMMs, are "
+        "linked instead of copied."
+    ),
+    citations=[citations["CheckV"]],
+)
+
+checkv_analysis_inputs = {
+    "sequences": SampleData[Contigs],
+    "database": CheckVDB | CheckVDBPacked,
+    "genes": SampleData[CheckVGenes],
+}
+checkv_analysis_input_descriptions = {
+    "sequences": "Input sequences.",
+    "database": "CheckV database. A packed database is extracted once into a "
+    "local cache and reused by later runs.",
+    "genes": "Genes previously predicted on the same input sequences by "
+    "checkv-analysis. If provided, gene calling is skipped for the samples "
+    "they contain.",
+}
+checkv_analysis_params = {
+    "num_threads": Int % Range(1, None),
+    "performance_profile": Str % Choices(list(PERFORMANCE_PROFILES)),
+    "progress_file": Str,
+    "keep_intermediates": Bool,
+    "consolidate_tables": Bool,
+}
+checkv_analysis_param_descriptions = {
+    "num_threads": "Number of threads to use for prodigal-gv and DIAMOND.",
+    "performance_profile": "Speed, sensitivity and memory trade-off of the "
+    "DIAMOND and hmmsearch searches run by CheckV. 'balanced' uses the CheckV "
+    "defaults. 'fast' runs DIAMOND in fast mode, which may miss distant hits "
+    "used for the AAI-based completeness. 'sensitive' runs DIAMOND in more "
+    "sensitive mode. 'low-memory' runs DIAMOND with smaller blocks and more "
+    "index chunks.",
+    "progress_file": "Path of a file to which progress reports (samples done "
+    "and remaining, contigs and base pairs per second and the estimated time "
+    "remaining) are appended as JSON lines. The reports are also printed in "
+    "verbose mode.",
+    "keep_intermediates": "Keep all intermediate files of CheckV (gene calls, "
+    "DIAMOND and HMM hits, AAI tables) in the intermediates output. By "
+    "default it only holds the tables needed by checkv-recompute-quality.",
+    "consolidate_tables": "Also append the rows of each sample, with its "
+    "sample ID in the first column, to a single consolidated table in the "
+    "quality_summary, contamination and completeness outputs as each sample "
+    "finishes. The per-sample tables are kept.",
+}
+checkv_analysis_outputs = [
+    ("viruses", SampleData[Contigs]),
+    ("proviruses", SampleData[Contigs]),
+    ("quality_summary", SampleData[ViromicsMetadata]),
+    ("contamination", SampleData[ViromicsMetadata]),
+    ("completeness", SampleData[ViromicsMetadata]),
+    ("predicted_genes", SampleData[CheckVGenes]),
+    ("intermediates", SampleData[CheckVIntermediates]),
+]
+checkv_analysis_output_descriptions = {
+    "viruses": "Viral sequences.",
+    "proviruses": "Proviral sequences.",
+    "quality_summary": "Summary of sequence quality, completeness, and "
+    "contamination.",
+    "contamination": "Details on contamination levels, viral and host genes.",
+    "completeness": "Completeness estimates and confidence levels.",
+    "predicted_genes": "Predicted proteins and gene coordinates. They can be "
+    "passed as genes to later runs on the same sequences.",
+    "intermediates": "Intermediate files of CheckV, from which "
+    "checkv-recompute-quality reruns the complete genome detection and the "
+    "quality summary.",
+}
+
+plugin.methods.register_function(
+    function=_checkv_analysis,
+    inputs=checkv_analysis_inputs,
+    parameters={**checkv_analysis_params, "run_context": Str},
+    input_descriptions=checkv_analysis_input_descriptions,
+    parameter_descriptions={
+        **checkv_analysis_param_descriptions,
+        "run_context": "Set by checkv-analysis: the run this partition belongs "
+        "to, whose totals are used in the progress reports.",
+    },
+    outputs=checkv_analysis_outputs,
+    output_descriptions=checkv_analysis_output_descriptions,
+    name="Analysis of viral genomes",
+    description="Assessing the quality and completeness of viral genomes.",
+    citations=[citations["CheckV"]],
+)
+
+plugin.pipelines.register_function(
     function=checkv_analysis,
+    inputs=checkv_analysis_inputs,
+    parameters={
+        **checkv_analysis_params,
+        "num_partitions": Int % Range(1, None),
+    },
+    input_descriptions=checkv_analysis_input_descriptions,
+    parameter_descriptions={
+        **checkv_analysis_param_descriptions,
+        "num_partitions": "The number of partitions to split the contigs "
+        "into. Defaults to partitioning into individual samples.",
+    },
+    outputs=checkv_analysis_outputs,
+    output_descriptions=checkv_analysis_output_descriptions,
+    name="Analysis of viral genomes",
+    description=(
+        "Assessing the quality and completeness of viral genomes. The input "
+        "samples are partitioned and analyzed in parallel when the action "
+        "is run with a parallel configuration."
+    ),
+    citations=[citations["CheckV"]],
+)
+
+plugin.methods.register_function(
+    function=checkv_recompute_quality,
     inputs={
         "sequences": SampleData[Contigs],
-        "database": CheckVDB,
+        "intermediates": SampleData[CheckVIntermediates],
     },
     parameters={
-        "num_threads": Int % Range(1, None),
+        "tr_min_len": Int % Range(1, None),
+        "tr_max_count": Int % Range(0, None),
+        "tr_max_ambig": Float % Range(0, 1, inclusive_end=True),
+        "tr_max_basefreq": Float % Range(0, 1, inclusive_end=True),
+        "kmer_max_freq": Float % Range(0, None),
     },
     input_descriptions={
-        "sequences": "Input sequences.",
-        "database": "CheckV database.",
+        "sequences": "Input sequences of checkv-analysis.",
+        "intermediates": "Intermediate files saved by checkv-analysis for the "
+        "same samples.",
     },
     parameter_descriptions={
-        "num_threads": "Number of threads to use for prodigal-gv and DIAMOND.",
+        "tr_min_len": "Minimum length of terminal repeats. Defaults to the "
+        "value of the installed CheckV.",
+        "tr_max_count": "Maximum number of occurrences of a terminal repeat "
+        "per contig. Defaults to the value of the installed CheckV.",
+        "tr_max_ambig": "Maximum fraction of a terminal repeat composed of Ns. "
+        "Defaults to the value of the installed CheckV.",
+        "tr_max_basefreq": "Maximum fraction of a terminal repeat composed of "
+        "a single nucleotide. Defaults to the value of the installed CheckV.",
+        "kmer_max_freq": "Maximum average k-mer frequency. Contigs above it "
+        "are flagged as containing multiple genome copies. Defaults to the "
+        "value of the installed CheckV.",
     },
     outputs=[
-        ("viruses", SampleData[Contigs]),
-        ("proviruses", SampleData[Contigs]),
         ("quality_summary", SampleData[ViromicsMetadata]),
-        ("contamination", SampleData[ViromicsMetadata]),
-        ("completeness", SampleData[ViromicsMetadata]),
+        ("complete_genomes", SampleData[ViromicsMetadata]),
     ],
     output_descriptions={
-        "viruses": "Viral sequences.",
-        "proviruses": "Proviral sequences.",
+        "quality_summary": "Summary of sequence quality, completeness, and "
+        "contamination.",
+        "complete_genomes": "Complete genomes identified from terminal "
+        "repeats and flanking host regions.",
+    },
+    name="Recompute CheckV quality summary",
+    description=(
+        "Rerun the complete genome detection and the quality summary of "
+        "CheckV from the intermediates of checkv-analysis, e.g. with other "
+        "terminal repeat thresholds. The gene calling, DIAMOND and HMM "
+        "searches are not repeated."
+    ),
+    citations=[citations["CheckV"]],
+)
+
+plugin.methods.register_function(
+    function=filter_viral_contigs,
+    inputs={
+        "sequences": SampleData[Contigs],
+        "quality_summary": SampleData[ViromicsMetadata],
+    },
+    parameters={
+        "quality_tiers": List[Str % Choices(QUALITY_TIERS)],
+        "min_completeness": Float % Range(0, 100, inclusive_end=True),
+        "max_contamination": Float % Range(0, 100, inclusive_end=True),
+    },
+    input_descriptions={
+        "sequences": "Viral or proviral sequences produced by checkv-analysis.",
+        "quality_summary": "CheckV quality summary of the same samples.",
+    },
+    parameter_descriptions={
+        "quality_tiers": "CheckV quality tiers of the contigs to keep. "
+        "Defaults to Complete and High-quality.",
+        "min_completeness": "Minimum estimated completeness (%) of the contigs "
+        "to keep. Contigs without a completeness estimate are discarded.",
+        "max_contamination": "Maximum estimated contamination (%) of the "
+        "contigs to keep. Contigs without a contamination estimate are "
+        "discarded.",
+    },
+    outputs=[("filtered_sequences", SampleData[Contigs])],
+    output_descriptions={
+        "filtered_sequences": "Sequences of the contigs passing the filters."
+    },
+    name="Filter viral contigs by CheckV quality",
+    description=(
+        "Keep the viral or proviral contigs of each sample whose CheckV "
+        "quality tier, completeness and contamination pass the given "
+        "thresholds."
+    ),
+    citations=[citations["CheckV"]],
+)
+
+plugin.visualizers.register_function(
+    function=summarize_checkv,
+    inputs={"quality_summary": SampleData[ViromicsMetadata]},
+    parameters={"num_bins": Int % Range(1, 100, inclusive_end=True)},
+    input_descriptions={
+        "quality_summary": "CheckV quality summary produced by checkv-analysis."
+    },
+    parameter_descriptions={
+        "num_bins": "Number of bins of the completeness and contamination "
+        "histograms."
+    },
+    name="Summarize CheckV results",
+    description=(
+        "Summarize the CheckV quality summary of a cohort: contig counts by "
+        "quality tier, completeness and contamination histograms and "
+        "provirus rates, per sample and across all samples. The tables are "
+        "read in chunks, so memory use does not depend on the number of "
+        "contigs."
+    ),
+    citations=[citations["CheckV"]],
+)
+
+plugin.methods.register_function(
+    function=index_checkv_results,
+    inputs={
+        "quality_summary": SampleData[ViromicsMetadata],
+        "contamination": SampleData[ViromicsMetadata],
+        "completeness": SampleData[ViromicsMetadata],
+        "viruses": SampleData[Contigs],
+        "proviruses": SampleData[Contigs],
+    },
+    parameters={},
+    input_descriptions={
         "quality_summary": "Summary of sequence quality, completeness, and "
         "contamination.",
         "contamination": "Details on contamination levels, viral and host genes.",
         "completeness": "Completeness estimates and confidence levels.",
+        "viruses": "Viral sequences.",
+        "proviruses": "Proviral sequences.",
     },
-    name="Analysis of viral genomes",
-    description="Assessing the quality and completeness of viral genomes.",
+    outputs=[("contig_index", CheckVContigIndex)],
+    output_descriptions={
+        "contig_index": "Index mapping every contig ID to its sample and to "
+        "the positions of its records in the CheckV outputs."
+    },
+    name="Index CheckV results by contig ID",
+    description=(
+        "Create an index of the outputs of checkv-analysis that maps every "
+        "contig ID to its sample, its rows in the CheckV tables and its "
+        "records in the viral and proviral sequences. The index can be used "
+        "with q2_viromics.contig_index.ContigLookup to retrieve the CheckV "
+        "results of single contigs without scanning the outputs."
+    ),
     citations=[citations["CheckV"]],
 )
 
+plugin.methods.register_function(
+    function=partition_contigs,
+    inputs={"sequences": SampleData[Contigs]},
+    parameters={"num_partitions": Int % Range(1, None)},
+    input_descriptions={"sequences": "The contigs to partition."},
+    parameter_descriptions={
+        "num_partitions": "The number of partitions to split the contigs "
+        "into. Defaults to partitioning into individual samples."
+    },
+    outputs={"partitioned_sequences": Collection[SampleData[Contigs]]},
+    output_descriptions={"partitioned_sequences": "The partitioned contigs."},
+    name="Partition contigs",
+    description="Partition contigs into individual samples or groups of samples.",
+)
+
+plugin.methods.register_function(
+    function=collate_contigs,
+    inputs={"sequences": List[SampleData[Contigs]]},
+    parameters={},
+    input_descriptions={"sequences": "A collection of contigs to be collated."},
+    outputs={"collated_sequences": SampleData[Contigs]},
+    output_descriptions={"collated_sequences": "The collated contigs."},
+    name="Collate contigs",
+    description="Takes a collection of contigs and collates them into a single "
+    "artifact.",
+)
+
+plugin.methods.register_function(
+    function=collate_checkv_genes,
+    inputs={"genes": List[SampleData[CheckVGenes]]},
+    parameters={},
+    input_descriptions={"genes": "A collection of gene predictions to be collated."},
+    outputs={"collated_genes": SampleData[CheckVGenes]},
+    output_descriptions={"collated_genes": "The collated gene predictions."},
+    name="Collate CheckV gene predictions",
+    description="Takes a collection of CheckV gene predictions and collates them "
+    "into a single artifact.",
+)
+
+plugin.methods.register_function(
+    function=collate_checkv_intermediates,
+    inputs={"intermediates": List[SampleData[CheckVIntermediates]]},
+    parameters={},
+    input_descriptions={
+        "intermediates": "A collection of CheckV intermediates to be collated."
+    },
+    outputs={"collated_intermediates": SampleData[CheckVIntermediates]},
+    output_descriptions={"collated_intermediates": "The collated intermediates."},
+    name="Collate CheckV intermediates",
+    description="Takes a collection of CheckV intermediates and collates them "
+    "into a single artifact.",
+)
+
+plugin.methods.register_function(
+    function=collate_viromics_metadata,
+    inputs={"metadata": List[SampleData[ViromicsMetadata]]},
+    parameters={},
+    input_descriptions={
+        "metadata": "A collection of viromics metadata to be collated."
+    },
+    outputs={"collated_metadata": SampleData[ViromicsMetadata]},
+    output_descriptions={"collated_metadata": "The collated viromics metadata."},
+    name="Collate viromics metadata",
+    description="Takes a collection of viromics metadata and collates them into "
+    "a single artifact.",
+)
+
 importlib.import_module("q2_viromics.types._transformer")
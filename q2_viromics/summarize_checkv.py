@@ -0,0 +1,152 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+from q2_viromics._utils import get_sample_tables
+from q2_viromics.filter_viral_contigs import QUALITY_TIERS
+from q2_viromics.types._format import ViromicsMetadataDirFmt
+
+TEMPLATES = os.path.join(os.path.dirname(__file__), "assets")
+
+# Number of rows of a quality summary read at once
+CHUNK_SIZE = 100_000
+
+COLUMNS = [
+    "contig_length",
+    "provirus",
+    "checkv_quality",
+    "completeness",
+    "contamination",
+]
+
+
+# Aggregate one quality summary chunk by chunk, so that memory use does not
+# depend on the number of contigs. Completeness and contamination are binned
+# right away into histograms with the given bin edges.
+def _summarize_sample(quality_summary_fp, bin_edges, chunk_size=CHUNK_SIZE):
+    import numpy as np
+    import pandas as pd
+
+    summary = {
+        "contigs": 0,
+        "base_pairs": 0,
+        "proviruses": 0,
+        "without_completeness": 0,
+        "tiers": np.zeros(len(QUALITY_TIERS), dtype=np.int64),
+        "completeness": np.zeros(len(bin_edges) - 1, dtype=np.int64),
+        "contamination": np.zeros(len(bin_edges) - 1, dtype=np.int64),
+    }
+
+    chunks = pd.read_csv(
+        quality_summary_fp,
+        sep="\t",
+        usecols=COLUMNS,
+        dtype={"provirus": str, "checkv_quality": str},
+        chunksize=chunk_size,
+    )
+    for chunk in chunks:
+        summary["contigs"] += len(chunk)
+        summary["base_pairs"] += int(chunk["contig_length"].sum())
+        summary["proviruses"] += int((chunk["provirus"] == "Yes").sum())
+
+        codes = pd.Categorical(chunk["checkv_quality"], categories=QUALITY_TIERS).codes
+        summary["tiers"] += np.bincount(codes[codes >= 0], minlength=len(QUALITY_TIERS))
+
+        completeness = pd.to_numeric(chunk["completeness"], errors="coerce")
+        summary["without_completeness"] += int(completeness.isna().sum())
+        for column in ["completeness", "contamination"]:
+            values = pd.to_numeric(chunk[column], errors="coerce").dropna()
+            summary[column] += np.histogram(
+                values.clip(bin_edges[0], bin_edges[-1]), bins=bin_edges
+            )[0]
+
+    return summary
+
+
+# Turn histogram counts into rows of a bar chart drawn with HTML
+def _histogram_rows(counts):
+    largest = max(int(counts.max()), 1)
+    return [
+        {"label": label, "count": int(count), "width": round(100 * count / largest, 1)}
+        for label, count in counts.items()
+    ]
+
+
+def summarize_checkv(
+    output_dir: str, quality_summary: ViromicsMetadataDirFmt, num_bins: int = 20
+) -> None:
+    import numpy as np
+    import pandas as pd
+    import q2templates
+
+    bin_edges = np.linspace(0, 100, num_bins + 1)
+    samples = get_sample_tables(quality_summary, "quality_summary")
+    summaries = {
+        sample_id: _summarize_sample(fp, bin_edges) for sample_id, fp in samples.items()
+    }
+
+    per_sample = pd.DataFrame(
+        {
+            "contigs": [s["contigs"] for s in summaries.values()],
+            "base_pairs": [s["base_pairs"] for s in summaries.values()],
+            "proviruses": [s["proviruses"] for s in summaries.values()],
+            "without_completeness": [
+                s["without_completeness"] for s in summaries.values()
+            ],
+        },
+        index=pd.Index(list(summaries), name="sample_id"),
+    )
+    tiers = pd.DataFrame(
+        np.array([s["tiers"] for s in summaries.values()]).reshape(
+            -1, len(QUALITY_TIERS)
+        ),
+        index=per_sample.index,
+        columns=QUALITY_TIERS,
+    )
+    per_sample = per_sample.join(tiers)
+    per_sample["provirus_rate"] = (
+        per_sample["proviruses"]
+        / per_sample["contigs"].where(per_sample["contigs"] > 0)
+    ).round(4)
+    per_sample.to_csv(os.path.join(output_dir, "per_sample_summary.tsv"), sep="\t")
+
+    bin_labels = [f"{bin_edges[i]:g}-{bin_edges[i + 1]:g}" for i in range(num_bins)]
+    histograms = {}
+    for column in ["completeness", "contamination"]:
+        counts = pd.DataFrame(
+            np.array([s[column] for s in summaries.values()]).reshape(-1, num_bins),
+            index=per_sample.index,
+            columns=bin_labels,
+        )
+        counts.to_csv(os.path.join(output_dir, f"{column}_histogram.tsv"), sep="\t")
+        histograms[column] = _histogram_rows(counts.sum())
+
+    # Samples without contigs have no provirus rate
+    records = per_sample.reset_index()
+    records = records.astype(object).where(records.notna(), None)
+
+    totals = per_sample[["contigs", "base_pairs", "proviruses", *QUALITY_TIERS]].sum()
+    context = {
+        "num_samples": len(per_sample),
+        "totals": {key: int(value) for key, value in totals.items()},
+        "provirus_rate": (
+            round(totals["proviruses"] / totals["contigs"], 4)
+            if totals["contigs"]
+            else None
+        ),
+        "tiers": QUALITY_TIERS,
+        "completeness_histogram": histograms["completeness"],
+        "contamination_histogram": histograms["contamination"],
+        "samples": records.to_dict(orient="records"),
+    }
+
+    q2templates.render(
+        os.path.join(TEMPLATES, "summarize_checkv", "index.html"),
+        output_dir,
+        context=context,
+    )
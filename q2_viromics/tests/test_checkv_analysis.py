@@ -6,14 +6,44 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+import json
+import os
+import random
+import shutil
 import subprocess
+import tempfile
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pandas as pd
 from q2_types.feature_data import DNAFASTAFormat
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
 
-from q2_viromics.checkv_analysis import checkv_analysis, checkv_end_to_end
+from q2_viromics._preflight import FastaStats
+from q2_viromics.checkv_analysis import (
+    CHECKV_TABLE_HEADERS,
+    PERFORMANCE_PROFILES,
+    _check_gene_seeding_support,
+    _checkv_analysis,
+    _get_search_env,
+    _save_intermediates,
+    _seed_gene_predictions,
+    _write_gene_coordinates,
+    checkv_analysis,
+    checkv_end_to_end,
+)
+from q2_viromics.partition import partition_contigs
+
+
+# Write one row per table, as CheckV would for a single contig
+def _fake_end_to_end(tmp, contigs_fp, *args):
+    os.makedirs(os.path.join(tmp, "tmp"))
+    for filename in ["viruses.fna", "proviruses.fna", "tmp/proteins.faa"]:
+        open(os.path.join(tmp, filename), "w").close()
+    for filename, columns in CHECKV_TABLE_HEADERS.items():
+        with open(os.path.join(tmp, filename), "w") as fh:
+            fh.write("\t".join(columns) + "\n")
+            fh.write("\t".join(["contig1"] + ["1"] * (len(columns) - 1)) + "\n")
 
 
 class TestCheckvAnalysis(unittest.TestCase):
@@ -79,6 +109,67 @@ class TestCheckvAnalysis(unittest.TestCase):
                 in str(context.exception)
             )
 
+    @patch("q2_viromics.checkv_analysis._get_search_env")
+    @patch("q2_viromics.checkv_analysis.run_command")
+    def test_checkv_end_to_end_performance_profile(
+        self, mock_run_command, mock_get_search_env
+    ):
+        mock_database = MagicMock()
+        mock_database.path = "/fake/database"
+        mock_get_search_env.return_value = {"PATH": "/fake/wrappers"}
+
+        with patch("os.listdir", return_value=["internal_db"]):
+            checkv_end_to_end(
+                "/fake/tmp",
+                "/fake/sequences",
+                mock_database,
+                num_threads=1,
+                performance_profile="fast",
+            )
+
+        self.assertEqual(mock_get_search_env.call_args[0][1], "fast")
+        mock_run_command.assert_called_once_with(
+            [
+                "checkv",
+                "end_to_end",
+                "/fake/sequences",
+                "/fake/tmp",
+                "-d",
+                "/fake/database/internal_db",
+                "-t",
+                "1",
+            ],
+            env={"PATH": "/fake/wrappers"},
+        )
+
+    @patch("shutil.which")
+    def test_get_search_env(self, mock_which):
+        mock_which.side_effect = lambda program: f"/opt/bin/{program}"
+
+        with tempfile.TemporaryDirectory() as wrapper_dir:
+            env = _get_search_env(wrapper_dir, "low-memory")
+
+            self.assertTrue(env["PATH"].startswith(wrapper_dir + os.pathsep))
+            # No hmmsearch settings in this profile
+            self.assertEqual(os.listdir(wrapper_dir), ["diamond"])
+            wrapper = os.path.join(wrapper_dir, "diamond")
+            self.assertTrue(os.access(wrapper, os.X_OK))
+            with open(wrapper) as fh:
+                self.assertIn(
+                    "exec /opt/bin/diamond blastp --block-size 0.5 "
+                    '--index-chunks 8 "$@"',
+                    fh.read(),
+                )
+
+    @patch("shutil.which", return_value=None)
+    def test_get_search_env_missing_program(self, mock_which):
+        with tempfile.TemporaryDirectory() as wrapper_dir:
+            with self.assertRaisesRegex(ValueError, "diamond was not found"):
+                _get_search_env(wrapper_dir, "low-memory")
+
+    @patch("q2_viromics.checkv_analysis._save_intermediates")
+    @patch("q2_viromics.checkv_analysis.count_fasta")
+    @patch("q2_viromics.checkv_analysis._write_gene_coordinates")
     @patch("q2_viromics.checkv_analysis.checkv_end_to_end")
     @patch("shutil.move")
     @patch("tempfile.TemporaryDirectory")
@@ -87,7 +178,11 @@ class TestCheckvAnalysis(unittest.TestCase):
         mock_tempdir,
         mock_shutil_move,
         mock_checkv_end_to_end,
+        mock_write_gene_coordinates,
+        mock_count_fasta,
+        mock_save_intermediates,
     ):
+        mock_count_fasta.return_value = FastaStats(2, 100, [], [], False)
         # Mock the temporary directory context manager
         mock_tempdir.return_value.__enter__.return_value = "/fake/tmp"
 
@@ -110,11 +205,11 @@ class TestCheckvAnalysis(unittest.TestCase):
         mock_database = MagicMock()
 
         # Call the function
-        result = checkv_analysis(mock_sequences, mock_database, num_threads=1)
+        result = _checkv_analysis(mock_sequences, mock_database, num_threads=1)
 
         # Assertions for checkv_end_to_end call
         mock_checkv_end_to_end.assert_called_once_with(
-            "/fake/tmp", "/fake/sequences", mock_database, 1
+            "/fake/tmp", "/fake/sequences", mock_database, 1, "balanced"
         )
 
         # Assertions for file movements
@@ -135,6 +230,437 @@ class TestCheckvAnalysis(unittest.TestCase):
         mock_shutil_move.assert_any_call(
             "/fake/tmp/completeness.tsv", str(result[4]) + "/sample_1_completeness.tsv"
         )
+        mock_shutil_move.assert_any_call(
+            "/fake/tmp/tmp/proteins.faa", str(result[5]) + "/sample_1_proteins.faa"
+        )
+        mock_write_gene_coordinates.assert_called_once_with(
+            str(result[5]) + "/sample_1_proteins.faa",
+            str(result[5]) + "/sample_1_gene_coordinates.tsv",
+        )
+        mock_save_intermediates.assert_called_once_with(
+            "/fake/tmp", str(result[6]) + "/sample_1", False
+        )
+
+    @patch("q2_viromics.checkv_analysis._check_gene_seeding_support")
+    @patch("q2_viromics.checkv_analysis._save_intermediates")
+    @patch("q2_viromics.checkv_analysis.count_fasta")
+    @patch("q2_viromics.checkv_analysis._write_gene_coordinates")
+    @patch("q2_viromics.checkv_analysis._seed_gene_predictions")
+    @patch("q2_viromics.checkv_analysis.checkv_end_to_end")
+    @patch("shutil.move")
+    @patch("tempfile.TemporaryDirectory")
+    def test_checkv_analysis_with_genes(
+        self,
+        mock_tempdir,
+        mock_shutil_move,
+        mock_checkv_end_to_end,
+        mock_seed_gene_predictions,
+        mock_write_gene_coordinates,
+        mock_count_fasta,
+        mock_save_intermediates,
+        mock_check_gene_seeding_support,
+    ):
+        mock_count_fasta.return_value = FastaStats(2, 100, [], [], False)
+        mock_tempdir.return_value.__enter__.return_value = "/fake/tmp"
+        mock_sequences = MagicMock()
+        mock_sequences.sample_dict.return_value = {
+            "sample1": "/fake/sequences1",
+            "sample2": "/fake/sequences2",
+        }
+        mock_genes = MagicMock()
+        mock_genes.sample_dict.return_value = {"sample1": "/fake/proteins.faa"}
+
+        _checkv_analysis(mock_sequences, MagicMock(), genes=mock_genes)
+
+        mock_seed_gene_predictions.assert_called_once_with(
+            "/fake/tmp", "/fake/proteins.faa"
+        )
+        self.assertEqual(mock_checkv_end_to_end.call_count, 2)
+        mock_check_gene_seeding_support.assert_called_once()
+
+    @patch("importlib.metadata.version")
+    def test_check_gene_seeding_support(self, mock_version):
+        mock_version.return_value = "1.1.1"
+        _check_gene_seeding_support()
+
+        mock_version.return_value = "2.0.0"
+        with self.assertRaisesRegex(ValueError, "CheckV 2.0.0"):
+            _check_gene_seeding_support()
+
+    @patch("q2_viromics.checkv_analysis.checkv_end_to_end")
+    def test_checkv_analysis_empty_sample(self, mock_checkv_end_to_end):
+        with tempfile.TemporaryDirectory() as tmp:
+            empty_fp = os.path.join(tmp, "empty_contigs.fa")
+            with open(empty_fp, "w") as fh:
+                fh.write("\n")
+            mock_sequences = MagicMock()
+            mock_sequences.sample_dict.return_value = {"empty": empty_fp}
+
+            progress_fp = os.path.join(tmp, "progress.jsonl")
+
+            result = _checkv_analysis(
+                mock_sequences, MagicMock(), progress_file=progress_fp
+            )
+
+            with open(progress_fp) as fh:
+                events = [json.loads(line)["event"] for line in fh]
+
+        self.assertEqual(events, ["start", "sample_done", "finish"])
+        mock_checkv_end_to_end.assert_not_called()
+        self.assertEqual(os.path.getsize(f"{result[0]}/empty_contigs.fa"), 0)
+        self.assertEqual(os.path.getsize(f"{result[1]}/empty_contigs.fa"), 0)
+        quality_summary = pd.read_csv(
+            f"{result[2]}/empty_quality_summary.tsv", sep="\t"
+        )
+        self.assertTrue(quality_summary.empty)
+        self.assertIn("checkv_quality", quality_summary.columns)
+        self.assertEqual(
+            sorted(os.listdir(f"{result[6]}/empty")),
+            ["complete_genomes.tsv", "completeness.tsv", "contamination.tsv"],
+        )
+        with open(f"{result[5]}/empty_gene_coordinates.tsv") as fh:
+            self.assertEqual(
+                fh.read(), "gene_id\tcontig_id\tstart\tend\tstrand\tpartial\n"
+            )
+
+    @patch("q2_viromics.checkv_analysis.checkv_end_to_end")
+    def test_checkv_analysis_consolidate_tables(self, mock_checkv_end_to_end):
+        mock_checkv_end_to_end.side_effect = _fake_end_to_end
+
+        with tempfile.TemporaryDirectory() as tmp:
+            samples = {}
+            for sample_id, content in [("s1", ">contig1\nACGT\n"), ("s2", "")]:
+                samples[sample_id] = os.path.join(tmp, f"{sample_id}_contigs.fa")
+                with open(samples[sample_id], "w") as fh:
+                    fh.write(content)
+            mock_sequences = MagicMock()
+            mock_sequences.sample_dict.return_value = samples
+
+            result = _checkv_analysis(
+                mock_sequences, MagicMock(), consolidate_tables=True
+            )
+
+        for table, filename in [
+            (result[2], "quality_summary.tsv"),
+            (result[3], "contamination.tsv"),
+            (result[4], "completeness.tsv"),
+        ]:
+            consolidated = pd.read_csv(f"{table}/consolidated.tsv", sep="\t")
+            self.assertEqual(
+                list(consolidated.columns),
+                ["sample_id"] + CHECKV_TABLE_HEADERS[filename],
+            )
+            self.assertEqual(list(consolidated["sample_id"]), ["s1"])
+            self.assertEqual(list(consolidated["contig_id"]), ["contig1"])
+            # The per-sample tables are kept
+            self.assertTrue(os.path.isfile(f"{table}/s1_{filename}"))
+            self.assertTrue(os.path.isfile(f"{table}/s2_{filename}"))
+            table.validate()
+
+    def test_save_intermediates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = os.path.join(tmp, "out")
+            os.makedirs(os.path.join(out_dir, "tmp"))
+            for filename in [
+                "contamination.tsv",
+                "completeness.tsv",
+                "complete_genomes.tsv",
+                "quality_summary.tsv",
+                os.path.join("tmp", "diamond.tsv"),
+            ]:
+                with open(os.path.join(out_dir, filename), "w") as fh:
+                    fh.write("contig_id\tvalue\n")
+
+            _save_intermediates(out_dir, os.path.join(tmp, "tables"), False)
+            _save_intermediates(out_dir, os.path.join(tmp, "all"), True)
+
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(tmp, "tables"))),
+                ["complete_genomes.tsv", "completeness.tsv", "contamination.tsv"],
+            )
+            self.assertTrue(
+                os.path.isfile(os.path.join(tmp, "all", "tmp", "diamond.tsv"))
+            )
+
+    def test_seed_gene_predictions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            proteins_fp = os.path.join(tmp, "input.faa")
+            with open(proteins_fp, "w") as fh:
+                fh.write(
+                    ">contig1_1 # 1 # 90 # 1 # ID=1_1;partial=00;start_type=ATG;"
+                    "rbs_motif=None;rbs_spacer=None;gc_cont=0.411\nMKV*\n"
+                )
+
+            _seed_gene_predictions(tmp, proteins_fp)
+
+            self.assertTrue(os.path.isdir(os.path.join(tmp, "tmp", "proteins")))
+            with open(os.path.join(tmp, "tmp", "proteins.faa")) as fh:
+                self.assertTrue(fh.readline().startswith(">contig1_1 # 1 # 90 # 1 #"))
+            with open(os.path.join(tmp, "tmp", "proteins", "1.faa")) as fh:
+                self.assertTrue(fh.readline().startswith(">contig1_1 # 1 # 90 # 1 #"))
+
+    def test_write_gene_coordinates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            proteins_fp = os.path.join(tmp, "proteins.faa")
+            coordinates_fp = os.path.join(tmp, "gene_coordinates.tsv")
+            with open(proteins_fp, "w") as fh:
+                fh.write(
+                    ">k141_5_1 # 2 # 91 # 1 # ID=1_1;partial=10;start_type=Edge;"
+                    "rbs_motif=None;rbs_spacer=None;gc_cont=0.456\nMKV\n"
+                    ">k141_5_2 # 150 # 290 # -1 # ID=1_2;partial=00;"
+                    "start_type=ATG;rbs_motif=GGA/GAG/AGG;rbs_spacer=5-10bp;"
+                    "gc_cont=0.421\nMAT*\n"
+                    # Header written by CheckV's own gene calling
+                    ">k141_6_1 # 3 # 98 # 1 # partial=01\nMAT\n"
+                )
+
+            _write_gene_coordinates(proteins_fp, coordinates_fp)
+
+            with open(coordinates_fp) as fh:
+                self.assertEqual(
+                    fh.read(),
+                    "gene_id\tcontig_id\tstart\tend\tstrand\tpartial\n"
+                    "k141_5_1\tk141_5\t2\t91\t1\t10\n"
+                    "k141_5_2\tk141_5\t150\t290\t-1\t00\n"
+                    "k141_6_1\tk141_6\t3\t98\t1\t01\n",
+                )
+
+    @patch("q2_viromics.checkv_analysis.preflight_check")
+    def test_checkv_analysis_pipeline(self, mock_preflight_check):
+        mock_preflight_check.return_value = {
+            "sample1": FastaStats(2, 100, [], [], False)
+        }
+        mock_ctx = MagicMock()
+        mock_sequences = MagicMock()
+        mock_sequences.view.return_value.sample_dict.return_value = {
+            "sample1": "/fake/sample1_contigs.fa"
+        }
+        mock_checkv = MagicMock(
+            side_effect=[
+                ("v1", "p1", "q1", "ct1", "cp1", "g1", "i1"),
+                ("v2", "p2", "q2", "ct2", "cp2", "g2", "i2"),
+            ]
+        )
+        mock_partition = MagicMock(
+            return_value=({"sample1": "part1", "sample2": "part2"},)
+        )
+        mock_collate_contigs = MagicMock(side_effect=[("viruses",), ("proviruses",)])
+        mock_collate_metadata = MagicMock(
+            side_effect=[("quality",), ("contamination",), ("completeness",)]
+        )
+        mock_collate_genes = MagicMock(return_value=("genes",))
+        mock_collate_intermediates = MagicMock(return_value=("intermediates",))
+        mock_ctx.get_action.side_effect = lambda plugin, action: {
+            "_checkv_analysis": mock_checkv,
+            "partition_contigs": mock_partition,
+            "collate_contigs": mock_collate_contigs,
+            "collate_viromics_metadata": mock_collate_metadata,
+            "collate_checkv_genes": mock_collate_genes,
+            "collate_checkv_intermediates": mock_collate_intermediates,
+        }[action]
+
+        result = checkv_analysis(
+            mock_ctx, mock_sequences, "database", num_threads=2, num_partitions=2
+        )
+
+        mock_preflight_check.assert_called_once_with(
+            {"sample1": "/fake/sample1_contigs.fa"}, 2, {}
+        )
+        mock_partition.assert_called_once_with(mock_sequences, 2)
+        for partition in ["part1", "part2"]:
+            mock_checkv.assert_any_call(
+                partition,
+                "database",
+                genes=None,
+                num_threads=2,
+                performance_profile="balanced",
+                progress_file=None,
+                keep_intermediates=False,
+                consolidate_tables=False,
+                run_context=ANY,
+            )
+        self.assertEqual(
+            [
+                json.loads(call.kwargs["run_context"])["partition_id"]
+                for call in mock_checkv.call_args_list
+            ],
+            ["1", "2"],
+        )
+        mock_collate_contigs.assert_any_call(["v1", "v2"])
+        mock_collate_contigs.assert_any_call(["p1", "p2"])
+        mock_collate_metadata.assert_any_call(["q1", "q2"])
+        mock_collate_metadata.assert_any_call(["ct1", "ct2"])
+        mock_collate_metadata.assert_any_call(["cp1", "cp2"])
+        mock_collate_genes.assert_called_once_with(["g1", "g2"])
+        mock_collate_intermediates.assert_called_once_with(["i1", "i2"])
+        self.assertEqual(
+            result,
+            (
+                "viruses",
+                "proviruses",
+                "quality",
+                "contamination",
+                "completeness",
+                "genes",
+                "intermediates",
+            ),
+        )
+
+    # The progress reports of all partitions cover the whole run
+    @patch("q2_viromics.checkv_analysis.checkv_end_to_end")
+    def test_checkv_analysis_pipeline_progress(self, mock_checkv_end_to_end):
+        mock_checkv_end_to_end.side_effect = _fake_end_to_end
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sequences_dir = os.path.join(tmp, "sequences")
+            os.makedirs(sequences_dir)
+            for sample_id, content in [
+                ("s1", ">c1\nACGT\n>c2\nACGTAC\n"),
+                ("s2", ">c1\nACGTACGT\n"),
+                ("s3", ""),
+            ]:
+                with open(
+                    os.path.join(sequences_dir, f"{sample_id}_contigs.fa"), "w"
+                ) as fh:
+                    fh.write(content)
+            sequences = ContigSequencesDirFmt(sequences_dir, "r")
+            progress_fp = os.path.join(tmp, "progress.jsonl")
+            mock_sequences = MagicMock()
+            mock_sequences.view.return_value = sequences
+            mock_ctx = MagicMock()
+            mock_ctx.get_action.side_effect = lambda plugin, action: {
+                "_checkv_analysis": _checkv_analysis,
+                "partition_contigs": lambda seqs, num_partitions: (
+                    partition_contigs(sequences, num_partitions),
+                ),
+            }.get(action, MagicMock(return_value=(None,)))
+
+            checkv_analysis(
+                mock_ctx, mock_sequences, MagicMock(), progress_file=progress_fp
+            )
+
+            with open(progress_fp) as fh:
+                records = [json.loads(line) for line in fh]
+
+        self.assertEqual(
+            [record["event"] for record in records],
+            ["start"]
+            + ["partition_start", "sample_done", "partition_finish"] * 3
+            + ["finish"],
+        )
+        self.assertEqual(len({record["run_id"] for record in records}), 1)
+        self.assertTrue(all(record["samples_total"] == 3 for record in records))
+        self.assertTrue(all(record["contigs_total"] == 3 for record in records))
+        sample_done = [r for r in records if r["event"] == "sample_done"]
+        self.assertEqual([r["partition_id"] for r in sample_done], ["1", "2", "3"])
+        self.assertEqual([r["samples_done"] for r in sample_done], [1, 2, 3])
+        self.assertEqual([r["base_pairs_done"] for r in sample_done], [10, 18, 18])
+        self.assertEqual(records[-1]["samples_remaining"], 0)
+        self.assertEqual(records[-1]["eta_seconds"], 0.0)
+
+
+@unittest.skipUnless(shutil.which("diamond"), "requires DIAMOND")
+class TestPerformanceProfiles(unittest.TestCase):
+    # Random proteins and copies of them with a growing share of substitutions,
+    # so that some hits are close and some are distant
+    def _write_proteins(self, tmp):
+        rng = random.Random(42)
+        amino_acids = "ACDEFGHIKLMNPQRSTVWY"
+        references, queries = [], []
+        for i in range(20):
+            protein = [rng.choice(amino_acids) for _ in range(200)]
+            references.append(f">ref{i}\n{''.join(protein)}\n")
+            for position in rng.sample(range(200), 8 * i):
+                protein[position] = rng.choice(amino_acids)
+            queries.append(f">query{i}\n{''.join(protein)}\n")
+
+        references_fp = os.path.join(tmp, "references.faa")
+        queries_fp = os.path.join(tmp, "queries.faa")
+        with open(references_fp, "w") as fh:
+            fh.writelines(references)
+        with open(queries_fp, "w") as fh:
+            fh.writelines(queries)
+        return references_fp, queries_fp
+
+    # Search the queries as CheckV does, through the wrappers of the profile
+    def _blastp(self, tmp, db_fp, queries_fp, performance_profile):
+        out_fp = os.path.join(tmp, f"{performance_profile}.tsv")
+        with tempfile.TemporaryDirectory() as wrapper_dir:
+            env = _get_search_env(wrapper_dir, performance_profile)
+            subprocess.run(
+                ["diamond", "blastp", "--db", db_fp, "--query", queries_fp]
+                + ["--out", out_fp, "--outfmt", "6", "qseqid", "sseqid"]
+                + ["--evalue", "1e-5", "--threads", "1", "--quiet"],
+                env=env,
+                check=True,
+            )
+        with open(out_fp) as fh:
+            return {tuple(line.split()) for line in fh}
+
+    def test_profile_hits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            references_fp, queries_fp = self._write_proteins(tmp)
+            db_fp = os.path.join(tmp, "references")
+            subprocess.run(
+                ["diamond", "makedb", "--in", references_fp, "--db", db_fp]
+                + ["--quiet"],
+                check=True,
+            )
+
+            hits = {
+                profile: self._blastp(tmp, db_fp, queries_fp, profile)
+                for profile in PERFORMANCE_PROFILES
+            }
+
+        self.assertTrue(hits["balanced"])
+        self.assertEqual(hits["low-memory"], hits["balanced"])
+        self.assertLessEqual(hits["balanced"], hits["sensitive"])
+        # Identical proteins are found with every profile
+        self.assertIn(("query0", "ref0"), hits["fast"])
+
+
+# CHECKVDB is the variable CheckV itself reads the database location from
+@unittest.skipUnless(
+    shutil.which("checkv") and os.environ.get("CHECKVDB"),
+    "requires CheckV and its database",
+)
+class TestGeneSeedingWithCheckV(unittest.TestCase):
+    def _end_to_end(self, out_dir, contigs_fp):
+        subprocess.run(
+            ["checkv", "end_to_end", contigs_fp, out_dir, "-t", "1", "--quiet"],
+            check=True,
+        )
+        return {
+            table: pd.read_csv(os.path.join(out_dir, table), sep="\t")
+            for table in [
+                "quality_summary.tsv",
+                "completeness.tsv",
+                "contamination.tsv",
+            ]
+        }
+
+    # Reusing the genes CheckV predicted must give the same results as letting
+    # CheckV predict them, which also checks GENE_SEEDING_CHECKV_VERSIONS
+    # against the installed CheckV
+    def test_seeded_genes_give_same_results(self):
+        _check_gene_seeding_support()
+        contigs_fp = os.path.join(
+            os.path.dirname(__file__), "data", "contigs", "sample1_contigs.fa"
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            plain_dir = os.path.join(tmp, "plain")
+            seeded_dir = os.path.join(tmp, "seeded")
+            expected = self._end_to_end(plain_dir, contigs_fp)
+
+            _seed_gene_predictions(
+                seeded_dir, os.path.join(plain_dir, "tmp", "proteins.faa")
+            )
+            observed = self._end_to_end(seeded_dir, contigs_fp)
+
+            for table in expected:
+                with self.subTest(table=table):
+                    pd.testing.assert_frame_equal(observed[table], expected[table])
 
 
 if __name__ == "__main__":
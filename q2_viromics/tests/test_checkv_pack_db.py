@@ -0,0 +1,26 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from qiime2 import Artifact
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics.types._format import CheckVDBDirFmt
+
+
+class TestCheckVPackDb(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_checkv_pack_db(self):
+        database = Artifact.import_data(
+            "CheckVDB", self.get_data_path("type/db"), view_type=CheckVDBDirFmt
+        )
+        pack_db = self.plugin.methods["checkv_pack_db"]
+
+        (packed,) = pack_db(database)
+
+        self.assertEqual(str(packed.type), "CheckVDBPacked")
+        packed.validate()
@@ -0,0 +1,91 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+import subprocess
+from unittest.mock import patch
+
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics.checkv_recompute_quality import checkv_recompute_quality
+from q2_viromics.types._format import CheckVIntermediatesDirFmt
+
+
+# Write the table of each CheckV step into the output directory
+def _fake_run_command(cmd):
+    step, out_dir = cmd[1], cmd[3]
+    with open(os.path.join(out_dir, f"{step}.tsv"), "w") as fh:
+        fh.write(f"contig_id\t{step}\ncontig1\tvalue\n")
+
+
+class TestCheckVRecomputeQuality(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def setUp(self):
+        super().setUp()
+        contigs_dir = os.path.join(self.temp_dir.name, "contigs")
+        os.makedirs(contigs_dir)
+        shutil.copy(self.get_data_path("contigs/sample1_contigs.fa"), contigs_dir)
+        self.sequences = ContigSequencesDirFmt(contigs_dir, "r")
+        self.intermediates = CheckVIntermediatesDirFmt(
+            self.get_data_path("intermediates"), "r"
+        )
+
+    @patch(
+        "q2_viromics.checkv_recompute_quality.run_command",
+        side_effect=_fake_run_command,
+    )
+    def test_checkv_recompute_quality(self, mock_run_command):
+        quality_summary, complete_genomes = checkv_recompute_quality(
+            self.sequences, self.intermediates, tr_min_len=30
+        )
+
+        contigs_fp = self.sequences.sample_dict()["sample1"]
+        complete_genomes_cmd = mock_run_command.call_args_list[0][0][0]
+        # Only the thresholds that are set are passed to CheckV
+        self.assertEqual(
+            complete_genomes_cmd[:2] + complete_genomes_cmd[4:],
+            ["checkv", "complete_genomes", "--tr_min_len", "30"],
+        )
+        self.assertEqual(complete_genomes_cmd[2], contigs_fp)
+        quality_summary_cmd = mock_run_command.call_args_list[1][0][0]
+        self.assertEqual(
+            quality_summary_cmd[:3], ["checkv", "quality_summary", contigs_fp]
+        )
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(str(quality_summary), "sample1_quality_summary.tsv")
+            )
+        )
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(str(complete_genomes), "sample1_complete_genomes.tsv")
+            )
+        )
+        # The saved tables are left unchanged
+        with open(
+            self.get_data_path("intermediates/sample1/complete_genomes.tsv")
+        ) as fh:
+            self.assertIn("DTR", fh.read())
+
+    def test_checkv_recompute_quality_missing_sample(self):
+        shutil.copy(
+            self.get_data_path("contigs/sample2_contigs.fa"), str(self.sequences)
+        )
+
+        with self.assertRaisesRegex(ValueError, "sample2"):
+            checkv_recompute_quality(self.sequences, self.intermediates)
+
+    @patch(
+        "q2_viromics.checkv_recompute_quality.run_command",
+        side_effect=subprocess.CalledProcessError(1, "checkv"),
+    )
+    def test_checkv_recompute_quality_failure(self, mock_run_command):
+        with self.assertRaisesRegex(Exception, "checkv complete_genomes"):
+            checkv_recompute_quality(self.sequences, self.intermediates)
@@ -0,0 +1,170 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import filecmp
+import os
+import shutil
+import unittest
+from unittest.mock import patch
+
+from q2_types.feature_data import DNAFASTAFormat
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics.checkv_update_db import (
+    _call_genes,
+    _concatenate,
+    _read_genome_lengths,
+    _split_fasta,
+    checkv_update_db,
+)
+from q2_viromics.types._format import CheckVDBDirFmt
+
+
+def _fake_call_genes(genomes_fp, out_dir, num_genomes, num_threads):
+    proteins_fp = os.path.join(out_dir, "proteins.faa")
+    with open(proteins_fp, "w") as fh:
+        fh.write(">new1_1 # 1 # 9 # 1 # ID=1_1;partial=00\nMKV*\n")
+    return proteins_fp
+
+
+# Write one protein per genome of the chunk, as prodigal-gv would
+def _fake_prodigal(cmd):
+    genomes_fp, proteins_fp = cmd[cmd.index("-i") + 1], cmd[cmd.index("-a") + 1]
+    with open(genomes_fp) as fin, open(proteins_fp, "w") as fout:
+        for line in fin:
+            if line.startswith(">"):
+                genome_id = line[1:].split()[0]
+                fout.write(f">{genome_id}_1 # 1 # 9 # 1 # ID=1_1;partial=00\nMKV*\n")
+
+
+class TestCheckVUpdateDB(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def setUp(self):
+        super().setUp()
+        db_dir = os.path.join(self.temp_dir.name, "db")
+        shutil.copytree(self.get_data_path("type/db"), db_dir)
+        self.genome_db = os.path.join(db_dir, "checkVdb", "genome_db")
+        with open(os.path.join(self.genome_db, "checkv_reps.fna"), "w") as fh:
+            fh.write(">CheckV-000001\nACGT")
+        self.database = CheckVDBDirFmt(db_dir, mode="r")
+
+        self.genomes_fp = os.path.join(self.temp_dir.name, "genomes.fna")
+        with open(self.genomes_fp, "w") as fh:
+            fh.write(">new1 phage\nACGTACGT\nAC\n>new2\nGGG\n")
+
+    def test_read_genome_lengths(self):
+        self.assertEqual(_read_genome_lengths(self.genomes_fp), {"new1": 10, "new2": 3})
+
+    def test_concatenate(self):
+        dst = os.path.join(self.temp_dir.name, "combined.fna")
+
+        _concatenate(
+            [os.path.join(self.genome_db, "checkv_reps.fna"), self.genomes_fp], dst
+        )
+
+        with open(dst) as fh:
+            self.assertEqual(
+                fh.read(),
+                ">CheckV-000001\nACGT\n>new1 phage\nACGTACGT\nAC\n>new2\nGGG\n",
+            )
+
+    def test_split_fasta(self):
+        chunk_fps = _split_fasta(self.genomes_fp, self.temp_dir.name, 2, 4)
+
+        self.assertEqual(len(chunk_fps), 2)
+        with open(chunk_fps[0]) as fh:
+            self.assertEqual(fh.read(), ">new1 phage\nACGTACGT\nAC\n")
+        with open(chunk_fps[1]) as fh:
+            self.assertEqual(fh.read(), ">new2\nGGG\n")
+
+    @patch("q2_viromics.checkv_update_db.run_command", side_effect=_fake_prodigal)
+    def test_call_genes(self, mock_run_command):
+        proteins_fp = _call_genes(self.genomes_fp, self.temp_dir.name, 2, 2)
+
+        self.assertEqual(mock_run_command.call_count, 2)
+        cmd = mock_run_command.call_args_list[0][0][0]
+        self.assertEqual(cmd[:5], ["prodigal-gv", "-p", "meta", "-m", "-q"])
+        with open(proteins_fp) as fh:
+            self.assertEqual(
+                [line.split()[0] for line in fh if line.startswith(">")],
+                [">new1_1", ">new2_1"],
+            )
+
+    @unittest.skipUnless(shutil.which("prodigal-gv"), "prodigal-gv is not installed")
+    def test_call_genes_prodigal(self):
+        genomes_fp = os.path.join(self.temp_dir.name, "genome.fna")
+        with open(genomes_fp, "w") as fh:
+            fh.write(">genome1\n" + "ATGAAAGCACGTCTGGCAGCAAAATAA" * 20 + "\n")
+
+        proteins_fp = _call_genes(genomes_fp, self.temp_dir.name, 1, 1)
+
+        # CheckV reads the gene IDs and coordinates from the headers
+        with open(proteins_fp) as fh:
+            headers = [line.split() for line in fh if line.startswith(">")]
+        self.assertTrue(headers)
+        for header in headers:
+            self.assertTrue(header[0].startswith(">genome1_"))
+            self.assertTrue(all(field.lstrip("-").isdigit() for field in header[2:7:2]))
+
+    @patch("q2_viromics.checkv_update_db._make_diamond_db")
+    @patch("q2_viromics.checkv_update_db._call_genes", side_effect=_fake_call_genes)
+    def test_checkv_update_db(self, mock_call_genes, mock_make_diamond_db):
+        with open(os.path.join(self.genome_db, "checkv_reps.tsv")) as fh:
+            reps = fh.read()
+
+        result = checkv_update_db(
+            self.database, DNAFASTAFormat(self.genomes_fp, mode="r"), num_threads=2
+        )
+
+        updated_db = os.path.join(str(result), "checkVdb")
+        updated_genome_db = os.path.join(updated_db, "genome_db")
+        mock_make_diamond_db.assert_called_once_with(
+            os.path.join(updated_genome_db, "checkv_reps.faa"),
+            os.path.join(updated_genome_db, "checkv_reps.dmnd"),
+            2,
+        )
+        with open(os.path.join(updated_genome_db, "checkv_reps.tsv")) as fh:
+            self.assertEqual(
+                fh.read(), reps + "new1\tcircular\t10\nnew2\tcircular\t3\n"
+            )
+        with open(os.path.join(updated_genome_db, "checkv_reps.faa")) as fh:
+            self.assertTrue(
+                fh.read().endswith(">new1_1 # 1 # 9 # 1 # ID=1_1;partial=00\nMKV*\n")
+            )
+
+        # The source database is left unchanged and the HMMs are reused
+        with open(os.path.join(self.genome_db, "checkv_reps.tsv")) as fh:
+            self.assertEqual(fh.read(), reps)
+        hmm_path = os.path.join("hmm_db", "checkv_hmms", "1.hmm")
+        self.assertTrue(
+            filecmp.cmp(
+                os.path.join(str(self.database), "checkVdb", hmm_path),
+                os.path.join(updated_db, hmm_path),
+                shallow=False,
+            )
+        )
+
+    @patch("q2_viromics.checkv_update_db._call_genes")
+    def test_checkv_update_db_existing_genome(self, mock_call_genes):
+        with open(self.genomes_fp, "w") as fh:
+            fh.write(">CheckV-000002\nACGT\n")
+
+        with self.assertRaisesRegex(ValueError, "CheckV-000002"):
+            checkv_update_db(self.database, DNAFASTAFormat(self.genomes_fp, mode="r"))
+
+        mock_call_genes.assert_not_called()
+
+    # The test database only has a misspelled checv_reps.fna
+    @patch("q2_viromics.checkv_update_db._call_genes")
+    def test_checkv_update_db_missing_files(self, mock_call_genes):
+        database = CheckVDBDirFmt(self.get_data_path("type/db"), mode="r")
+
+        with self.assertRaisesRegex(ValueError, r"genome_db/checkv_reps\.fna\."):
+            checkv_update_db(database, DNAFASTAFormat(self.genomes_fp, mode="r"))
+
+        mock_call_genes.assert_not_called()
@@ -0,0 +1,70 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import filecmp
+import os
+
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics.contig_index import ContigLookup, index_checkv_results
+from q2_viromics.types._format import ViromicsMetadataDirFmt
+
+
+class TestContigIndex(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.quality_summary = ViromicsMetadataDirFmt(
+            self.get_data_path("filter/quality_summary"), "r"
+        )
+        self.viruses = ContigSequencesDirFmt(self.get_data_path("filter/viruses"), "r")
+        self.proviruses = ContigSequencesDirFmt(
+            self.get_data_path("filter/proviruses"), "r"
+        )
+
+    def test_index_checkv_results(self):
+        index = index_checkv_results(
+            self.quality_summary, viruses=self.viruses, proviruses=self.proviruses
+        )
+
+        self.assertTrue(
+            filecmp.cmp(
+                os.path.join(str(index), "contig_index.tsv"),
+                self.get_data_path("contig_index/contig_index.tsv"),
+                shallow=False,
+            )
+        )
+        index.validate()
+
+    def test_contig_lookup(self):
+        index = index_checkv_results(
+            self.quality_summary, viruses=self.viruses, proviruses=self.proviruses
+        )
+
+        with ContigLookup(
+            index,
+            quality_summary=self.quality_summary,
+            viruses=self.viruses,
+            proviruses=self.proviruses,
+        ) as lookup:
+            (obs,) = lookup.lookup("contig5")
+
+        self.assertEqual(obs["sample_id"], "sample1")
+        self.assertEqual(obs["quality_summary"]["checkv_quality"], "Low-quality")
+        self.assertEqual(obs["quality_summary"]["completeness"], "20.1")
+        self.assertIsNone(obs["contamination"])
+        self.assertEqual(obs["viruses"], ">contig5\nTTTTACGATCGACTGA\n")
+        self.assertEqual(obs["proviruses"], ">contig5_1 1-8/16\nTTTTACGA\n")
+
+    def test_contig_lookup_missing_contig(self):
+        index = index_checkv_results(self.quality_summary)
+
+        with ContigLookup(index, quality_summary=self.quality_summary) as lookup:
+            with self.assertRaisesRegex(KeyError, "contig42"):
+                lookup.lookup("contig42")
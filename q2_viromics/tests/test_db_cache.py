@@ -0,0 +1,127 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics._db_cache import (
+    archive_fingerprint,
+    extract_to_cache,
+    get_cache_dir,
+    link_tree,
+    pack_directory,
+)
+
+
+class TestDBCache(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.db_dir = self.get_data_path("type/db")
+        self.archive = os.path.join(self.temp_dir.name, "checkv_db.zip")
+        pack_directory(self.db_dir, self.archive)
+
+    def test_pack_directory(self):
+        with zipfile.ZipFile(self.archive) as zf:
+            names = zf.namelist()
+
+        self.assertIn("checkVdb/README.txt", names)
+        self.assertIn("checkVdb/genome_db/checkv_reps.dmnd", names)
+        self.assertIn("checkVdb/hmm_db/checkv_hmms/1.hmm", names)
+        self.assertEqual(names, sorted(names))
+
+    def test_archive_fingerprint(self):
+        other_archive = os.path.join(self.temp_dir.name, "other.zip")
+        pack_directory(self.db_dir, other_archive)
+        self.assertEqual(
+            archive_fingerprint(self.archive), archive_fingerprint(other_archive)
+        )
+
+        with zipfile.ZipFile(other_archive, "a") as zf:
+            zf.writestr("checkVdb/genome_db/new.tsv", "a\tb\n1\t2\n")
+        self.assertNotEqual(
+            archive_fingerprint(self.archive), archive_fingerprint(other_archive)
+        )
+
+    def test_extract_to_cache(self):
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+        extracted = extract_to_cache(self.archive, cache_dir)
+
+        self.assertEqual(
+            extracted, os.path.join(cache_dir, archive_fingerprint(self.archive))
+        )
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(extracted, "checkVdb/genome_db/checkv_reps.tsv")
+            )
+        )
+        self.assertEqual(
+            sorted(os.listdir(cache_dir)),
+            [os.path.basename(extracted), os.path.basename(extracted) + ".members"],
+        )
+
+    def test_extract_to_cache_reuses_extraction(self):
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+        extract_to_cache(self.archive, cache_dir)
+
+        with patch("zipfile.ZipFile.extractall") as mock_extractall:
+            extract_to_cache(self.archive, cache_dir)
+
+        mock_extractall.assert_not_called()
+
+    # An extraction that lost a member is extracted again
+    def test_extract_to_cache_incomplete_extraction(self):
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+        extracted = extract_to_cache(self.archive, cache_dir)
+        member = os.path.join(extracted, "checkVdb/genome_db/checkv_reps.tsv")
+        os.remove(member)
+
+        self.assertEqual(extract_to_cache(self.archive, cache_dir), extracted)
+
+        self.assertTrue(os.path.isfile(member))
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    # An extraction without a completion marker is not trusted
+    def test_extract_to_cache_missing_marker(self):
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+        extracted = extract_to_cache(self.archive, cache_dir)
+        os.remove(extracted + ".members")
+
+        with patch("zipfile.ZipFile.extractall") as mock_extractall:
+            extract_to_cache(self.archive, cache_dir)
+
+        mock_extractall.assert_called_once()
+        self.assertTrue(os.path.isfile(extracted + ".members"))
+
+    def test_extract_to_cache_cleans_up_on_failure(self):
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+        with patch("zipfile.ZipFile.extractall", side_effect=OSError("disk full")):
+            with self.assertRaisesRegex(OSError, "disk full"):
+                extract_to_cache(self.archive, cache_dir)
+
+        self.assertEqual(os.listdir(cache_dir), [])
+
+    def test_get_cache_dir(self):
+        with patch.dict(os.environ, {"Q2_VIROMICS_CACHE_DIR": "/fake/cache"}):
+            self.assertEqual(get_cache_dir(), "/fake/cache/checkv-db")
+
+    def test_link_tree(self):
+        with tempfile.TemporaryDirectory() as dst:
+            link_tree(self.db_dir, dst)
+
+            linked = os.path.join(dst, "checkVdb/hmm_db/checkv_hmms/1.hmm")
+            with open(linked) as fh_linked, open(
+                os.path.join(self.db_dir, "checkVdb/hmm_db/checkv_hmms/1.hmm")
+            ) as fh_original:
+                self.assertEqual(fh_linked.read(), fh_original.read())
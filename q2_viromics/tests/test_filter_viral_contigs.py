@@ -0,0 +1,61 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics.filter_viral_contigs import filter_viral_contigs
+from q2_viromics.types._format import ViromicsMetadataDirFmt
+
+
+class TestFilterViralContigs(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.quality_summary = ViromicsMetadataDirFmt(
+            self.get_data_path("filter/quality_summary"), "r"
+        )
+
+    def _get_ids(self, sequences):
+        with open(sequences.sample_dict()["sample1"]) as fh:
+            return [line[1:].split()[0] for line in fh if line.startswith(">")]
+
+    def test_filter_viral_contigs_default(self):
+        viruses = ContigSequencesDirFmt(self.get_data_path("filter/viruses"), "r")
+
+        obs = filter_viral_contigs(viruses, self.quality_summary)
+
+        self.assertEqual(self._get_ids(obs), ["contig1", "contig2"])
+        with open(obs.sample_dict()["sample1"]) as fh:
+            self.assertEqual(len(fh.readlines()), 6)
+
+    def test_filter_viral_contigs_thresholds(self):
+        viruses = ContigSequencesDirFmt(self.get_data_path("filter/viruses"), "r")
+
+        obs = filter_viral_contigs(
+            viruses,
+            self.quality_summary,
+            quality_tiers=["Complete", "High-quality", "Low-quality"],
+            min_completeness=15.0,
+            max_contamination=5.0,
+        )
+
+        self.assertEqual(self._get_ids(obs), ["contig1", "contig5"])
+
+    def test_filter_viral_contigs_proviruses(self):
+        proviruses = ContigSequencesDirFmt(self.get_data_path("filter/proviruses"), "r")
+
+        obs = filter_viral_contigs(proviruses, self.quality_summary)
+
+        self.assertEqual(self._get_ids(obs), ["contig3_1"])
+
+    def test_filter_viral_contigs_missing_sample(self):
+        sequences = ContigSequencesDirFmt(self.get_data_path("contigs"), "r")
+
+        with self.assertRaisesRegex(ValueError, "sample2, sample3"):
+            filter_viral_contigs(sequences, self.quality_summary)
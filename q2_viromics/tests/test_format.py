@@ -5,15 +5,26 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import os
+import shutil
+
 from qiime2.plugin import ValidationError
 from qiime2.plugin.testing import TestPluginBase
 
+from q2_viromics._db_cache import pack_directory
 from q2_viromics.types._format import (
+    CheckVContigIndexFormat,
+    CheckVDBArchiveFormat,
     CheckVDBDirFmt,
+    CheckVGenesDirFmt,
+    CheckVIntermediatesDirFmt,
+    CheckVProteinsFormat,
+    GeneCoordinatesFormat,
     GeneralBinaryFileFormat,
     GeneralTSVFormat,
     HMMFormat,
     ViromicsMetadataDirFmt,
+    ViromicsMetadataFormat,
 )
 
 
@@ -135,3 +146,113 @@ class TestViromicsMetadataDirFmt(TestPluginBase):
         result_path = obj.metadata_files_path_maker(name="sample1_quality_summary")
         expected_path = "type/checkVMetadata/sample1_quality_summary.tsv"
         self.assertEqual(str(result_path), expected_path)
+
+    # Tables of samples without contigs only have a header
+    def test_ViromicsMetadataFormat_header_only(self):
+        filepath = os.path.join(self.temp_dir.name, "empty_quality_summary.tsv")
+        with open(filepath, "w") as fh:
+            fh.write("contig_id\tcontig_length\tcheckv_quality\n")
+        ViromicsMetadataFormat(filepath, mode="r").validate()
+        with self.assertRaisesRegex(ValidationError, "empty"):
+            GeneralTSVFormat(filepath, mode="r").validate()
+
+
+class TestCheckVContigIndexFormat(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVContigIndexFormat(self):
+        filepath = self.get_data_path("contig_index/contig_index.tsv")
+        format = CheckVContigIndexFormat(filepath, mode="r")
+        format.validate()
+
+    def test_CheckVContigIndexFormat_wrong_header(self):
+        filepath = self.get_data_path("type/checkVMetadata/sample1_quality_summary.tsv")
+        format = CheckVContigIndexFormat(filepath, mode="r")
+        with self.assertRaisesRegex(ValidationError, "header"):
+            format.validate()
+
+
+class TestCheckVGenesFormats(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVProteinsFormat(self):
+        filepath = self.get_data_path("genes/sample1_proteins.faa")
+        format = CheckVProteinsFormat(filepath, mode="r")
+        format.validate()
+
+    def test_CheckVProteinsFormat_neg(self):
+        filepath = self.get_data_path("genes/sample1_gene_coordinates.tsv")
+        format = CheckVProteinsFormat(filepath, mode="r")
+        with self.assertRaisesRegex(ValidationError, "FASTA"):
+            format.validate()
+
+    def test_GeneCoordinatesFormat(self):
+        filepath = self.get_data_path("genes/sample1_gene_coordinates.tsv")
+        format = GeneCoordinatesFormat(filepath, mode="r")
+        format.validate()
+
+    def test_GeneCoordinatesFormat_neg(self):
+        filepath = self.get_data_path("genes/sample1_proteins.faa")
+        format = GeneCoordinatesFormat(filepath, mode="r")
+        with self.assertRaisesRegex(ValidationError, "header"):
+            format.validate()
+
+    def test_CheckVGenesDirFmt(self):
+        filepath = self.get_data_path("genes/")
+        format = CheckVGenesDirFmt(filepath, mode="r")
+        format.validate()
+
+    def test_CheckVGenesDirFmt_sample_dict(self):
+        filepath = self.get_data_path("genes/")
+        format = CheckVGenesDirFmt(filepath, mode="r")
+        self.assertEqual(
+            format.sample_dict(),
+            {"sample1": os.path.join(filepath, "sample1_proteins.faa")},
+        )
+
+
+class TestCheckVDBArchiveFormat(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVDBArchiveFormat(self):
+        archive = os.path.join(self.temp_dir.name, "checkv_db.zip")
+        pack_directory(self.get_data_path("type/db"), archive)
+        format = CheckVDBArchiveFormat(archive, mode="r")
+        format.validate(level="max")
+
+    def test_CheckVDBArchiveFormat_not_zip(self):
+        filepath = self.get_data_path("type/db/checkVdb/genome_db/checkv_reps.dmnd")
+        format = CheckVDBArchiveFormat(filepath, mode="r")
+        with self.assertRaisesRegex(ValidationError, "not a zip archive"):
+            format.validate()
+
+    def test_CheckVDBArchiveFormat_missing_members(self):
+        archive = os.path.join(self.temp_dir.name, "checkv_db.zip")
+        pack_directory(self.get_data_path("type/db/checkVdb/genome_db"), archive)
+        format = CheckVDBArchiveFormat(archive, mode="r")
+        with self.assertRaisesRegex(ValidationError, "README.txt"):
+            format.validate()
+
+
+class TestCheckVIntermediatesDirFmt(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVIntermediatesDirFmt(self):
+        filepath = self.get_data_path("intermediates/")
+        format = CheckVIntermediatesDirFmt(filepath, mode="r")
+        format.validate()
+
+        self.assertEqual(
+            format.sample_dict(), {"sample1": os.path.join(filepath, "sample1")}
+        )
+
+    def test_CheckVIntermediatesDirFmt_missing_table(self):
+        sample_dir = os.path.join(self.temp_dir.name, "sample1")
+        os.makedirs(sample_dir)
+        for filename in ["contamination.tsv", "completeness.tsv"]:
+            shutil.copy(
+                self.get_data_path(f"intermediates/sample1/{filename}"), sample_dir
+            )
+        format = CheckVIntermediatesDirFmt(self.temp_dir.name, mode="r")
+        with self.assertRaisesRegex(ValidationError, "complete_genomes"):
+            format.validate()
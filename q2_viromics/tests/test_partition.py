@@ -0,0 +1,133 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+import shutil
+
+from q2_types.per_sample_sequences import ContigSequencesDirFmt
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics.partition import (
+    collate_checkv_genes,
+    collate_checkv_intermediates,
+    collate_contigs,
+    collate_viromics_metadata,
+    partition_contigs,
+)
+from q2_viromics.types._format import (
+    CheckVGenesDirFmt,
+    CheckVIntermediatesDirFmt,
+    ViromicsMetadataDirFmt,
+)
+
+
+class TestPartitionCollate(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.sequences = ContigSequencesDirFmt(self.get_data_path("contigs"), "r")
+
+    def test_partition_contigs_per_sample(self):
+        partitions = partition_contigs(self.sequences)
+
+        self.assertEqual(set(partitions), {"sample1", "sample2", "sample3"})
+        for sample_id, partition in partitions.items():
+            self.assertEqual(list(partition.sample_dict()), [sample_id])
+
+    def test_partition_contigs_num_partitions(self):
+        partitions = partition_contigs(self.sequences, num_partitions=2)
+
+        self.assertEqual(set(partitions), {1, 2})
+        self.assertEqual(sorted(partitions[1].sample_dict()), ["sample1", "sample2"])
+        self.assertEqual(list(partitions[2].sample_dict()), ["sample3"])
+
+    def test_partition_contigs_too_many_partitions(self):
+        with self.assertWarnsRegex(UserWarning, "3 partitions"):
+            partitions = partition_contigs(self.sequences, num_partitions=5)
+        self.assertEqual(len(partitions), 3)
+
+    def test_collate_contigs(self):
+        partitions = partition_contigs(self.sequences)
+
+        collated = collate_contigs(list(partitions.values()))
+
+        self.assertEqual(
+            sorted(collated.sample_dict()), ["sample1", "sample2", "sample3"]
+        )
+
+    def test_collate_contigs_duplicated_sample(self):
+        with self.assertRaisesRegex(ValueError, "sample1_contigs.fa"):
+            collate_contigs([self.sequences, self.sequences])
+
+    def test_collate_viromics_metadata(self):
+        parts = []
+        for file_name in ["sample1_quality_summary.tsv", "sample2_quality_summary.tsv"]:
+            part = ViromicsMetadataDirFmt()
+            shutil.copy(
+                self.get_data_path(f"type/checkVMetadata/{file_name}"),
+                os.path.join(str(part), file_name),
+            )
+            parts.append(part)
+
+        collated = collate_viromics_metadata(parts)
+
+        self.assertEqual(
+            sorted(os.listdir(str(collated))),
+            ["sample1_quality_summary.tsv", "sample2_quality_summary.tsv"],
+        )
+        collated.validate()
+
+    def test_collate_viromics_metadata_consolidated(self):
+        parts = []
+        for sample_id in ["sample1", "sample2"]:
+            part = ViromicsMetadataDirFmt()
+            with open(os.path.join(str(part), "consolidated.tsv"), "w") as fh:
+                fh.write(f"sample_id\tcontig_id\n{sample_id}\tcontig1\n")
+            with open(
+                os.path.join(str(part), f"{sample_id}_quality_summary.tsv"), "w"
+            ) as fh:
+                fh.write("contig_id\tcontig_length\ncontig1\t10\n")
+            parts.append(part)
+
+        collated = collate_viromics_metadata(parts)
+
+        self.assertEqual(
+            sorted(os.listdir(str(collated))),
+            [
+                "consolidated.tsv",
+                "sample1_quality_summary.tsv",
+                "sample2_quality_summary.tsv",
+            ],
+        )
+        with open(os.path.join(str(collated), "consolidated.tsv")) as fh:
+            self.assertEqual(
+                fh.read(),
+                "sample_id\tcontig_id\nsample1\tcontig1\nsample2\tcontig1\n",
+            )
+        collated.validate()
+
+    def test_collate_checkv_genes(self):
+        genes = CheckVGenesDirFmt(self.get_data_path("genes"), "r")
+
+        collated = collate_checkv_genes([genes])
+
+        self.assertEqual(list(collated.sample_dict()), ["sample1"])
+        collated.validate()
+
+    def test_collate_checkv_intermediates(self):
+        intermediates = CheckVIntermediatesDirFmt(
+            self.get_data_path("intermediates"), "r"
+        )
+
+        collated = collate_checkv_intermediates([intermediates])
+
+        self.assertEqual(list(collated.sample_dict()), ["sample1"])
+        self.assertTrue(
+            os.path.isfile(os.path.join(str(collated), "sample1/tmp/diamond.tsv"))
+        )
+        collated.validate()
@@ -0,0 +1,54 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import subprocess
+import sys
+import unittest
+
+# Time in seconds that importing plugin_setup may take once QIIME 2 and
+# q2-types are loaded
+IMPORT_TIME_BUDGET = 0.5
+
+# Modules only needed when an action runs
+DEFERRED_MODULES = ["pyhmmer", "q2templates"]
+
+
+# Import the plugin in a fresh interpreter so that modules loaded by other
+# tests do not hide slow imports
+def _run_in_subprocess(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+class TestPluginImport(unittest.TestCase):
+    def test_plugin_import_time(self):
+        elapsed = _run_in_subprocess(
+            "import time\n"
+            "import qiime2.plugin\n"
+            "import q2_types.per_sample_sequences\n"
+            "import q2_types.sample_data\n"
+            "start = time.perf_counter()\n"
+            "import q2_viromics.plugin_setup\n"
+            "print(time.perf_counter() - start)\n"
+        )
+
+        self.assertLess(float(elapsed), IMPORT_TIME_BUDGET)
+
+    def test_plugin_import_defers_modules(self):
+        loaded = _run_in_subprocess(
+            "import sys\n"
+            "import q2_viromics.plugin_setup\n"
+            f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])\n"
+        )
+
+        self.assertEqual(loaded, "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics._preflight import count_fasta, preflight_check, scan_fasta
+
+
+class TestPreflight(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def _write(self, file_name, content):
+        fp = os.path.join(self.temp_dir.name, file_name)
+        with open(fp, "w") as fh:
+            fh.write(content)
+        return fp
+
+    def test_scan_fasta(self):
+        fp = self._write(
+            "sample1_contigs.fa",
+            ">contig1 some description\nACGTN\nacgt\n>contig2\r\nGGCC\r\n",
+        )
+
+        stats = scan_fasta(fp)
+
+        self.assertEqual(stats.contigs, 2)
+        self.assertEqual(stats.base_pairs, 13)
+        self.assertEqual(stats.duplicated_ids, [])
+        self.assertEqual(stats.invalid_characters, [])
+        self.assertFalse(stats.headerless)
+
+    # Records spanning several chunks must give the same result
+    def test_scan_fasta_small_chunks(self):
+        fp = self.get_data_path("contigs/sample1_contigs.fa")
+
+        self.assertEqual(scan_fasta(fp, chunk_size=3), scan_fasta(fp))
+
+    def test_scan_fasta_problems(self):
+        fp = self._write(
+            "sample1_contigs.fa",
+            "ACGT\n>contig1\nACGT\n>contig1\nAC-GT*\n>contig2\nAC>GT\n",
+        )
+
+        stats = scan_fasta(fp, chunk_size=8)
+
+        self.assertEqual(stats.contigs, 3)
+        self.assertEqual(stats.duplicated_ids, ["contig1"])
+        self.assertEqual(stats.invalid_characters, ["*", "-", ">"])
+        self.assertTrue(stats.headerless)
+
+    # Stray characters are reported, but not counted as bases
+    def test_scan_fasta_whitespace(self):
+        fp = self._write("sample1_contigs.fa", ">contig1\nAC GT\t\n")
+
+        stats = scan_fasta(fp)
+
+        self.assertEqual(stats.base_pairs, 4)
+        self.assertEqual(stats.invalid_characters, ["\t", " "])
+
+    def test_count_fasta(self):
+        fp = self.get_data_path("contigs/sample1_contigs.fa")
+
+        stats = scan_fasta(fp)
+
+        self.assertEqual(count_fasta(fp, chunk_size=3), stats)
+        self.assertEqual(count_fasta(fp), stats)
+
+    def test_preflight_check(self):
+        samples = {
+            "sample1": self.get_data_path("contigs/sample1_contigs.fa"),
+            "empty": self._write("empty_contigs.fa", ""),
+        }
+
+        stats = preflight_check(samples)
+
+        self.assertGreater(stats["sample1"].contigs, 0)
+        self.assertEqual(stats["empty"].contigs, 0)
+
+    def test_preflight_check_genes_from_other_contigs(self):
+        samples = {
+            "sample1": self._write("s1.fa", ">k141_5\nACGT\n>k141_6\nACGT\n"),
+            "sample2": self._write("s2.fa", ">k141_7\nACGT\n"),
+        }
+        proteins = {
+            "sample1": self._write(
+                "s1.faa",
+                ">k141_5_1 # 1 # 3 # 1 # ID=1_1;partial=00\nM\n"
+                ">k141_6_1 # 1 # 3 # 1 # ID=2_1;partial=00\nM\n",
+            ),
+            "sample2": self._write(
+                "s2.faa", ">k141_5_1 # 1 # 3 # 1 # ID=1_1;partial=00\nM\n"
+            ),
+        }
+
+        with self.assertRaisesRegex(ValueError, "'sample2' belong to .*'k141_5'"):
+            preflight_check(samples, proteins=proteins)
+
+        del proteins["sample2"]
+        stats = preflight_check(samples, proteins=proteins)
+        self.assertEqual(stats["sample1"].unknown_gene_contigs, [])
+
+    def test_preflight_check_empty_genes(self):
+        samples = {
+            "sample1": self._write("s1.fa", ">k141_5\nACGT\n"),
+            "empty": self._write("empty.fa", ""),
+        }
+        proteins = {
+            "sample1": self._write("s1.faa", ""),
+            "empty": self._write("empty.faa", ""),
+        }
+
+        with self.assertRaisesRegex(ValueError, "'sample1' contain no proteins"):
+            preflight_check(samples, proteins=proteins)
+
+        del proteins["sample1"]
+        stats = preflight_check(samples, proteins=proteins)
+        self.assertFalse(stats["empty"].empty_genes)
+
+    # All problems are reported in a single error
+    def test_preflight_check_reports_all_problems(self):
+        samples = {
+            "sample_1": self.get_data_path("contigs/sample1_contigs.fa"),
+            "sample2": self._write("dup.fa", ">c1\nACGT\n>c1\nACGT\n"),
+            "sample3": self._write("prot.fa", ">c1\nMKVLAT\n"),
+        }
+
+        with self.assertRaises(ValueError) as context:
+            preflight_check(samples, num_threads=2)
+
+        message = str(context.exception)
+        self.assertIn("'sample_1' contains an underscore", message)
+        self.assertIn("'sample2' contains duplicated contig IDs: 'c1'", message)
+        self.assertIn("'sample3' contains non-nucleotide characters: 'L'.", message)
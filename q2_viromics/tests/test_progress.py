@@ -0,0 +1,138 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from q2_viromics._preflight import FastaStats
+from q2_viromics._progress import ProgressReporter, new_run_context
+
+
+class TestProgressReporter(unittest.TestCase):
+    def setUp(self):
+        self.sample_stats = {
+            "sample1": FastaStats(10, 1000, [], [], False),
+            "sample2": FastaStats(30, 3000, [], [], False),
+        }
+
+    def _read_records(self, fp):
+        with open(fp) as fh:
+            return [json.loads(line) for line in fh]
+
+    @patch("builtins.print")
+    @patch("time.monotonic", return_value=10.0)
+    def test_snapshot(self, mock_monotonic, mock_print):
+        reporter = ProgressReporter(self.sample_stats)
+        reporter._start_time = 0.0
+
+        reporter.sample_done("sample1")
+        snapshot = reporter.snapshot()
+
+        self.assertEqual(snapshot["samples_done"], 1)
+        self.assertEqual(snapshot["samples_remaining"], 1)
+        self.assertEqual(snapshot["contigs_total"], 40)
+        self.assertEqual(snapshot["base_pairs_total"], 4000)
+        self.assertEqual(snapshot["contigs_per_second"], 1.0)
+        self.assertEqual(snapshot["base_pairs_per_second"], 100.0)
+        self.assertEqual(snapshot["eta_seconds"], 30.0)
+        self.assertIn("1/2 samples done, 1 remaining", mock_print.call_args[0][0])
+        self.assertIn("ETA 0:00:30", mock_print.call_args[0][0])
+
+    @patch("builtins.print")
+    def test_progress_file(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp:
+            progress_fp = os.path.join(tmp, "progress.jsonl")
+
+            with ProgressReporter(self.sample_stats, progress_fp) as reporter:
+                for sample_id in self.sample_stats:
+                    reporter.sample_started(sample_id)
+                    reporter.sample_done(sample_id)
+
+            records = self._read_records(progress_fp)
+
+        self.assertEqual(
+            [record["event"] for record in records],
+            ["start", "sample_done", "sample_done", "finish"],
+        )
+        self.assertEqual(records[1]["sample_id"], "sample1")
+        self.assertIsNone(records[0]["eta_seconds"])
+        self.assertEqual(records[-1]["samples_remaining"], 0)
+        self.assertEqual(records[-1]["eta_seconds"], 0.0)
+
+    @patch("builtins.print")
+    def test_periodic_and_error_reports(self, mock_print):
+        with tempfile.TemporaryDirectory() as tmp:
+            progress_fp = os.path.join(tmp, "progress.jsonl")
+
+            with self.assertRaises(RuntimeError):
+                with ProgressReporter(
+                    self.sample_stats, progress_fp, interval=0.01
+                ) as reporter:
+                    reporter.sample_started("sample1")
+                    time.sleep(0.1)
+                    raise RuntimeError("CheckV failed")
+
+            records = self._read_records(progress_fp)
+
+        self.assertEqual(records[1]["event"], "progress")
+        self.assertEqual(records[1]["current_sample"], "sample1")
+        self.assertEqual(records[-1]["event"], "error")
+
+    # Partitions of a run read each other's progress from the shared file
+    @patch("builtins.print")
+    def test_run_level_reports(self, mock_print):
+        run_context = new_run_context(self.sample_stats)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            progress_fp = os.path.join(tmp, "progress.jsonl")
+            partitions = [
+                ProgressReporter(
+                    {sample_id: stats},
+                    progress_fp,
+                    run_context={**run_context, "partition_id": str(i)},
+                )
+                for i, (sample_id, stats) in enumerate(self.sample_stats.items(), 1)
+            ]
+
+            for partition in partitions:
+                partition.start()
+            for partition, sample_id in zip(partitions, self.sample_stats):
+                partition.sample_started(sample_id)
+                partition.sample_done(sample_id)
+                partition.stop()
+
+            records = self._read_records(progress_fp)
+
+        self.assertEqual(
+            [record["event"] for record in records],
+            [
+                "partition_start",
+                "partition_start",
+                "sample_done",
+                "partition_finish",
+                "sample_done",
+                "partition_finish",
+                "finish",
+            ],
+        )
+        self.assertEqual(records[4]["partition_id"], "2")
+        self.assertEqual(records[4]["samples_done"], 2)
+        self.assertEqual(records[4]["contigs_done"], 40)
+        self.assertEqual(records[4]["partition_samples_done"], 1)
+        self.assertEqual(records[3]["samples_remaining"], 1)
+        self.assertEqual(records[-1]["samples_remaining"], 0)
+        self.assertTrue(
+            all(record["run_id"] == run_context["run_id"] for record in records)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2024, Bokulich Lab.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+import os
+
+import numpy as np
+import pandas as pd
+from qiime2.plugin.testing import TestPluginBase
+
+from q2_viromics.summarize_checkv import _summarize_sample, summarize_checkv
+from q2_viromics.types._format import ViromicsMetadataDirFmt
+
+
+class TestSummarizeCheckV(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def setUp(self):
+        super().setUp()
+        self.quality_summary_fp = self.get_data_path(
+            "filter/quality_summary/sample1_quality_summary.tsv"
+        )
+
+    def test_summarize_sample(self):
+        summary = _summarize_sample(self.quality_summary_fp, np.linspace(0, 100, 5))
+
+        self.assertEqual(summary["contigs"], 5)
+        self.assertEqual(summary["base_pairs"], 128)
+        self.assertEqual(summary["proviruses"], 1)
+        self.assertEqual(summary["without_completeness"], 1)
+        np.testing.assert_array_equal(summary["tiers"], [1, 2, 0, 1, 1])
+        np.testing.assert_array_equal(summary["completeness"], [1, 0, 0, 3])
+        np.testing.assert_array_equal(summary["contamination"], [4, 0, 0, 0])
+
+    # Reading the table in chunks gives the same result as in one go
+    def test_summarize_sample_chunks(self):
+        bin_edges = np.linspace(0, 100, 21)
+        whole = _summarize_sample(self.quality_summary_fp, bin_edges)
+        chunked = _summarize_sample(self.quality_summary_fp, bin_edges, chunk_size=2)
+
+        for key, value in whole.items():
+            np.testing.assert_array_equal(chunked[key], value)
+
+    def test_summarize_checkv(self):
+        quality_summary = ViromicsMetadataDirFmt()
+        with open(self.quality_summary_fp) as fin:
+            content = fin.read()
+        for sample_id, text in [
+            ("sample1", content),
+            ("empty", content.splitlines(keepends=True)[0]),
+        ]:
+            with open(
+                os.path.join(str(quality_summary), f"{sample_id}_quality_summary.tsv"),
+                "w",
+            ) as fout:
+                fout.write(text)
+        output_dir = self.temp_dir.name
+
+        summarize_checkv(output_dir, quality_summary, num_bins=4)
+
+        self.assertTrue(os.path.isfile(os.path.join(output_dir, "index.html")))
+        per_sample = pd.read_csv(
+            os.path.join(output_dir, "per_sample_summary.tsv"), sep="\t", index_col=0
+        )
+        self.assertEqual(per_sample.loc["sample1", "High-quality"], 2)
+        self.assertEqual(per_sample.loc["sample1", "provirus_rate"], 0.2)
+        self.assertEqual(per_sample.loc["empty", "contigs"], 0)
+        self.assertTrue(np.isnan(per_sample.loc["empty", "provirus_rate"]))
+        completeness = pd.read_csv(
+            os.path.join(output_dir, "completeness_histogram.tsv"),
+            sep="\t",
+            index_col=0,
+        )
+        self.assertEqual(
+            list(completeness.columns), ["0-25", "25-50", "50-75", "75-100"]
+        )
+        self.assertEqual(list(completeness.loc["sample1"]), [1, 0, 0, 3])
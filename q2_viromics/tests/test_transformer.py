@@ -5,13 +5,20 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import os
+import shutil
 import unittest
+from unittest.mock import patch
 
 import pandas as pd
 import qiime2
 from qiime2.plugin.testing import TestPluginBase
 
-from q2_viromics.types._format import ViromicsMetadataDirFmt
+from q2_viromics.types._format import (
+    CheckVDBDirFmt,
+    CheckVDBPackedDirFmt,
+    ViromicsMetadataDirFmt,
+)
 from q2_viromics.types._transformer import combine_sample_metadata
 
 
@@ -39,6 +46,63 @@ class test_Viromics_to_qiime_metadata_transformer(TestPluginBase):
 
         pd.testing.assert_frame_equal(exp, viromics_metadata)
 
+    def test_combine_sample_metadata_consolidated(self):
+        source = self.get_data_path("viromics_metadata/viromics_metadata_dir")
+        # Numeric sample IDs must stay strings, as in the per-sample tables
+        for sample_ids in [["sample1", "sample2"], ["1", "2"]]:
+            with self.subTest(sample_ids=sample_ids):
+                data_path = os.path.join(self.temp_dir.name, sample_ids[0])
+                os.makedirs(data_path)
+                for file_name, sample_id in zip(sorted(os.listdir(source)), sample_ids):
+                    shutil.copy(
+                        os.path.join(source, file_name),
+                        os.path.join(data_path, f"{sample_id}_virus_summary.tsv"),
+                    )
+                exp = combine_sample_metadata(data_path)
+                exp.to_csv(
+                    os.path.join(data_path, "consolidated.tsv"), sep="\t", index=False
+                )
+
+                # Only the consolidated table is read
+                with patch("pandas.read_csv", wraps=pd.read_csv) as mock_read_csv:
+                    viromics_metadata = combine_sample_metadata(data_path)
+
+                mock_read_csv.assert_called_once()
+                pd.testing.assert_frame_equal(exp, viromics_metadata)
+                self.assertEqual(
+                    list(viromics_metadata["sample_id"].unique()), sample_ids
+                )
+
+
+class TestCheckVDBPackedTransformers(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVDBDirFmt_to_CheckVDBPackedDirFmt(self):
+        transformer = self.get_transformer(CheckVDBDirFmt, CheckVDBPackedDirFmt)
+        database = CheckVDBDirFmt(self.get_data_path("type/db"), "r")
+
+        packed = transformer(database)
+
+        self.assertIsInstance(packed, CheckVDBPackedDirFmt)
+        packed.validate()
+
+    def test_CheckVDBPackedDirFmt_to_CheckVDBDirFmt(self):
+        to_packed = self.get_transformer(CheckVDBDirFmt, CheckVDBPackedDirFmt)
+        from_packed = self.get_transformer(CheckVDBPackedDirFmt, CheckVDBDirFmt)
+        packed = to_packed(CheckVDBDirFmt(self.get_data_path("type/db"), "r"))
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+        with patch.dict(os.environ, {"Q2_VIROMICS_CACHE_DIR": cache_dir}):
+            database = from_packed(packed)
+            database_again = from_packed(packed)
+
+        self.assertIsInstance(database, CheckVDBDirFmt)
+        database.validate()
+        self.assertEqual(os.listdir(str(database)), ["checkVdb"])
+        self.assertEqual(os.listdir(str(database_again)), ["checkVdb"])
+        # The archive is only extracted once
+        self.assertEqual(len(os.listdir(os.path.join(cache_dir, "checkv-db"))), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,9 +5,18 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+from q2_types.sample_data import SampleData
 from qiime2.plugin.testing import TestPluginBase
 
-from q2_viromics.types._type import CheckVDB, ViromicsMetadata
+from q2_viromics.types._format import CheckVGenesDirFmt, CheckVIntermediatesDirFmt
+from q2_viromics.types._type import (
+    CheckVContigIndex,
+    CheckVDB,
+    CheckVDBPacked,
+    CheckVGenes,
+    CheckVIntermediates,
+    ViromicsMetadata,
+)
 
 
 class TestCheckVDbType(TestPluginBase):
@@ -22,3 +31,41 @@ class TestViromicsMetadataType(TestPluginBase):
 
     def test_ViromicsMetadata_registration(self):
         self.assertRegisteredSemanticType(ViromicsMetadata)
+
+
+class TestCheckVContigIndexType(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVContigIndex_registration(self):
+        self.assertRegisteredSemanticType(CheckVContigIndex)
+
+
+class TestCheckVGenesType(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVGenes_registration(self):
+        self.assertRegisteredSemanticType(CheckVGenes)
+
+    def test_CheckVGenes_semantic_type_registered_to_dirfmt(self):
+        self.assertSemanticTypeRegisteredToFormat(
+            SampleData[CheckVGenes], CheckVGenesDirFmt
+        )
+
+
+class TestCheckVDBPackedType(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVDBPacked_registration(self):
+        self.assertRegisteredSemanticType(CheckVDBPacked)
+
+
+class TestCheckVIntermediatesType(TestPluginBase):
+    package = "q2_viromics.tests"
+
+    def test_CheckVIntermediates_registration(self):
+        self.assertRegisteredSemanticType(CheckVIntermediates)
+
+    def test_CheckVIntermediates_semantic_type_registered_to_dirfmt(self):
+        self.assertSemanticTypeRegisteredToFormat(
+            SampleData[CheckVIntermediates], CheckVIntermediatesDirFmt
+        )
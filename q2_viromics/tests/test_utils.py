@@ -5,10 +5,12 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
-from q2_viromics._utils import run_command
+from q2_viromics._utils import append_table, run_command
 
 
 class TestRunCommand(unittest.TestCase):
@@ -16,10 +18,53 @@ class TestRunCommand(unittest.TestCase):
     def test_run_command_with_verbose(self, mock_run):
         cmd = ["echo", "hello"]
         run_command(cmd, verbose=True)
-        mock_run.assert_called_once_with(cmd, check=True)
+        mock_run.assert_called_once_with(cmd, check=True, env=None)
 
     @patch("subprocess.run")
     def test_run_command_no_verbose(self, mock_run):
         cmd = ["echo", "hello"]
         run_command(cmd, verbose=False)
-        mock_run.assert_called_once_with(cmd, check=True)
+        mock_run.assert_called_once_with(cmd, check=True, env=None)
+
+    @patch("subprocess.run")
+    def test_run_command_with_env(self, mock_run):
+        cmd = ["echo", "hello"]
+        env = {"PATH": "/fake/bin"}
+        run_command(cmd, verbose=False, env=env)
+        mock_run.assert_called_once_with(cmd, check=True, env=env)
+
+
+class TestAppendTable(unittest.TestCase):
+    def test_append_table(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = {}
+            for sample_id, rows in [("s1", "c1\t10\nc2\t20\n"), ("s2", "")]:
+                sources[sample_id] = os.path.join(tmp, f"{sample_id}.tsv")
+                with open(sources[sample_id], "w") as fh:
+                    fh.write("contig_id\tlength\n" + rows)
+            dst = os.path.join(tmp, "consolidated.tsv")
+
+            append_table(sources["s1"], dst, "s1")
+            append_table(sources["s2"], dst, "s2")
+            append_table(sources["s1"], dst, "s3")
+
+            with open(dst) as fh:
+                self.assertEqual(
+                    fh.read(),
+                    "sample_id\tcontig_id\tlength\n"
+                    "s1\tc1\t10\ns1\tc2\t20\n"
+                    "s3\tc1\t10\ns3\tc2\t20\n",
+                )
+
+    def test_append_table_without_sample_id(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "part.tsv")
+            with open(src, "w") as fh:
+                fh.write("sample_id\tcontig_id\ns1\tc1\n")
+            dst = os.path.join(tmp, "consolidated.tsv")
+
+            append_table(src, dst)
+            append_table(src, dst)
+
+            with open(dst) as fh:
+                self.assertEqual(fh.read(), "sample_id\tcontig_id\ns1\tc1\ns1\tc1\n")
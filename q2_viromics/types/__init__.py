@@ -5,12 +5,44 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
-from ._format import CheckVDBDirFmt, ViromicsMetadataDirFmt
-from ._type import CheckVDB, ViromicsMetadata
+from ._format import (
+    CheckVContigIndexDirFmt,
+    CheckVContigIndexFormat,
+    CheckVDBArchiveFormat,
+    CheckVDBDirFmt,
+    CheckVDBPackedDirFmt,
+    CheckVGenesDirFmt,
+    CheckVIntermediatesDirFmt,
+    CheckVProteinsFormat,
+    GeneCoordinatesFormat,
+    ViromicsMetadataDirFmt,
+    ViromicsMetadataFormat,
+)
+from ._type import (
+    CheckVContigIndex,
+    CheckVDB,
+    CheckVDBPacked,
+    CheckVGenes,
+    CheckVIntermediates,
+    ViromicsMetadata,
+)
 
 __all__ = [
     "CheckVDB",
     "ViromicsMetadata",
     "CheckVDBDirFmt",
+    "ViromicsMetadataFormat",
     "ViromicsMetadataDirFmt",
+    "CheckVContigIndex",
+    "CheckVContigIndexFormat",
+    "CheckVContigIndexDirFmt",
+    "CheckVGenes",
+    "CheckVProteinsFormat",
+    "GeneCoordinatesFormat",
+    "CheckVGenesDirFmt",
+    "CheckVDBPacked",
+    "CheckVDBArchiveFormat",
+    "CheckVDBPackedDirFmt",
+    "CheckVIntermediates",
+    "CheckVIntermediatesDirFmt",
 ]
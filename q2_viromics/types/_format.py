@@ -5,23 +5,29 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
+import os
+import re
 import subprocess
+import zipfile
 
-import pandas as pd
-from pyhmmer.plan7 import HMMFile
 from qiime2.core.exceptions import ValidationError
 from qiime2.plugin import model
 
 
 # Format for validating general TSV files
 class GeneralTSVFormat(model.TextFileFormat):
+    # Whether a file with a header but no rows is valid
+    allow_empty_rows = False
+
     def _validate_(self, level):
+        import pandas as pd
+
         try:
             # Read the TSV file into a DataFrame, ensuring it uses tab as a separator
             df = pd.read_csv(str(self), sep="\t", dtype=str, keep_default_na=False)
 
             # Ensure that the file is not empty
-            if df.empty:
+            if df.empty and not (self.allow_empty_rows and df.shape[1] > 0):
                 raise ValidationError("The file is empty.")
 
             # Check if the DataFrame has more than one column
@@ -46,6 +52,10 @@ class GeneralBinaryFileFormat(model.BinaryFileFormat):
 # Format for validating HMM profiles files
 class HMMFormat(model.TextFileFormat):
     def _validate_(self, level: str):
+        # pyhmmer is only needed for validation, so it is not loaded with
+        # the plugin
+        from pyhmmer.plan7 import HMMFile
+
         tolerance = 0.0001
         with HMMFile(str(self)) as hmm_file:
             hmm = hmm_file.read()
@@ -111,10 +121,197 @@ class CheckVDBDirFmt(model.DirectoryFormat):
         return "%s/hmm_db/%s.tsv" % (outer_dir, name)
 
 
+# Format for a CheckV database packed into a single zip archive
+class CheckVDBArchiveFormat(model.BinaryFileFormat):
+    REQUIRED_MEMBERS = {
+        "README.txt": r"[^/]+/README\.txt$",
+        "DIAMOND database": r"[^/]+/genome_db/.+\.dmnd$",
+        "HMM profiles": r"[^/]+/hmm_db/.+/.+\.hmm$",
+    }
+
+    def _validate_(self, level):
+        if not zipfile.is_zipfile(str(self)):
+            raise ValidationError("The file is not a zip archive.")
+
+        with zipfile.ZipFile(str(self)) as zf:
+            names = zf.namelist()
+            for description, pattern in self.REQUIRED_MEMBERS.items():
+                if not any(re.match(pattern, name) for name in names):
+                    raise ValidationError(
+                        f"The archive does not contain the {description} of a "
+                        "CheckV database."
+                    )
+
+            if level == "max":
+                corrupt_member = zf.testzip()
+                if corrupt_member is not None:
+                    raise ValidationError(
+                        f"The archive member {corrupt_member} is corrupt."
+                    )
+
+
+CheckVDBPackedDirFmt = model.SingleFileDirectoryFormat(
+    "CheckVDBPackedDirFmt", "checkv_db.zip", CheckVDBArchiveFormat
+)
+
+
+# Format for proteins predicted by CheckV's gene calling
+class CheckVProteinsFormat(model.TextFileFormat):
+    def _validate_(self, level):
+        with open(str(self)) as fh:
+            first_line = fh.readline()
+            if first_line and not first_line.startswith(">"):
+                raise ValidationError(
+                    "The protein file does not appear to be in FASTA format."
+                )
+
+
+# Format for the coordinates of the genes predicted by CheckV
+class GeneCoordinatesFormat(model.TextFileFormat):
+    COLUMNS = ["gene_id", "contig_id", "start", "end", "strand", "partial"]
+
+    def _validate_(self, level):
+        with open(str(self)) as fh:
+            header = fh.readline().rstrip("\n").split("\t")
+            if header != self.COLUMNS:
+                raise ValidationError(
+                    "The gene coordinates header does not match the expected "
+                    f"columns: {', '.join(self.COLUMNS)}."
+                )
+
+
+# Directory format for the genes predicted by CheckV
+class CheckVGenesDirFmt(model.DirectoryFormat):
+    proteins = model.FileCollection(r".+_proteins\.faa$", format=CheckVProteinsFormat)
+    gene_coordinates = model.FileCollection(
+        r".+_gene_coordinates\.tsv$", format=GeneCoordinatesFormat
+    )
+
+    @proteins.set_path_maker
+    def proteins_path_maker(self, sample_id):
+        return "%s_proteins.faa" % sample_id
+
+    @gene_coordinates.set_path_maker
+    def gene_coordinates_path_maker(self, sample_id):
+        return "%s_gene_coordinates.tsv" % sample_id
+
+    def sample_dict(self):
+        suffix = "_proteins.faa"
+        return {
+            file_name[: -len(suffix)]: os.path.join(str(self), file_name)
+            for file_name in sorted(os.listdir(str(self)))
+            if file_name.endswith(suffix)
+        }
+
+
+# Format for the contig ID index of CheckV outputs
+class CheckVContigIndexFormat(model.TextFileFormat):
+    COLUMNS = [
+        "contig_id",
+        "sample_id",
+        "quality_summary_row",
+        "quality_summary_offset",
+        "quality_summary_length",
+        "contamination_row",
+        "contamination_offset",
+        "contamination_length",
+        "completeness_row",
+        "completeness_offset",
+        "completeness_length",
+        "viruses_offset",
+        "viruses_length",
+        "proviruses_offset",
+        "proviruses_length",
+    ]
+
+    def _validate_(self, level):
+        n_lines = 10 if level == "min" else None
+        with open(str(self)) as fh:
+            header = fh.readline().rstrip("\n").split("\t")
+            if header != self.COLUMNS:
+                raise ValidationError(
+                    "The contig index header does not match the expected "
+                    f"columns: {', '.join(self.COLUMNS)}."
+                )
+            for i, line in enumerate(fh, 2):
+                if n_lines is not None and i > n_lines:
+                    break
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) != len(self.COLUMNS):
+                    raise ValidationError(
+                        f"Line {i} of the contig index has {len(fields)} "
+                        f"fields, expected {len(self.COLUMNS)}."
+                    )
+                if not all(field.lstrip("-").isdigit() for field in fields[2:]):
+                    raise ValidationError(
+                        f"Line {i} of the contig index contains non-integer " "offsets."
+                    )
+
+
+CheckVContigIndexDirFmt = model.SingleFileDirectoryFormat(
+    "CheckVContigIndexDirFmt", "contig_index.tsv", CheckVContigIndexFormat
+)
+
+
 # Directory format for output tsv files
+# CheckV writes tables without rows for samples in which no contig passed
+class ViromicsMetadataFormat(GeneralTSVFormat):
+    allow_empty_rows = True
+
+
 class ViromicsMetadataDirFmt(model.DirectoryFormat):
-    metadata_files = model.FileCollection(r"[^/]+\.tsv$", format=GeneralTSVFormat)
+    # Optional table with the rows of all samples and their sample IDs in the
+    # first column, next to the per-sample tables
+    CONSOLIDATED_TABLE = "consolidated.tsv"
+
+    metadata_files = model.FileCollection(
+        r"(?!consolidated\.tsv$)[^/]+\.tsv$", format=ViromicsMetadataFormat
+    )
+    consolidated = model.File(
+        r"consolidated\.tsv$", format=ViromicsMetadataFormat, optional=True
+    )
 
     @metadata_files.set_path_maker
     def metadata_files_path_maker(self, name):
         return "%s.tsv" % (name)
+
+
+# Directory format for the intermediate files of CheckV, with one directory
+# per sample. The tables are enough to rerun complete_genomes and
+# quality_summary; the tmp directory is only present if it was kept.
+class CheckVIntermediatesDirFmt(model.DirectoryFormat):
+    contamination = model.FileCollection(
+        r"[^/]+/contamination\.tsv$", format=ViromicsMetadataFormat
+    )
+    completeness = model.FileCollection(
+        r"[^/]+/completeness\.tsv$", format=ViromicsMetadataFormat
+    )
+    complete_genomes = model.FileCollection(
+        r"[^/]+/complete_genomes\.tsv$", format=ViromicsMetadataFormat
+    )
+    tmp_files = model.FileCollection(
+        r"[^/]+/tmp/.+$", format=GeneralBinaryFileFormat, optional=True
+    )
+
+    @contamination.set_path_maker
+    def contamination_path_maker(self, sample_id):
+        return "%s/contamination.tsv" % sample_id
+
+    @completeness.set_path_maker
+    def completeness_path_maker(self, sample_id):
+        return "%s/completeness.tsv" % sample_id
+
+    @complete_genomes.set_path_maker
+    def complete_genomes_path_maker(self, sample_id):
+        return "%s/complete_genomes.tsv" % sample_id
+
+    @tmp_files.set_path_maker
+    def tmp_files_path_maker(self, sample_id, name):
+        return "%s/tmp/%s" % (sample_id, name)
+
+    def sample_dict(self):
+        return {
+            sample_id: os.path.join(str(self), sample_id)
+            for sample_id in sorted(os.listdir(str(self)))
+            if os.path.isdir(os.path.join(str(self), sample_id))
+        }
@@ -7,14 +7,27 @@
 # ----------------------------------------------------------------------------
 import os
 
-import pandas as pd
 import qiime2
 
+from .._db_cache import extract_to_cache, link_tree, pack_directory
 from ..plugin_setup import plugin
-from ._format import ViromicsMetadataDirFmt
+from ._format import CheckVDBDirFmt, CheckVDBPackedDirFmt, ViromicsMetadataDirFmt
 
 
 def combine_sample_metadata(data_path):
+    import pandas as pd
+
+    # The consolidated table already holds the rows of all samples
+    consolidated_fp = os.path.join(
+        str(data_path), ViromicsMetadataDirFmt.CONSOLIDATED_TABLE
+    )
+    if os.path.isfile(consolidated_fp):
+        # Sample IDs are strings, as when taken from the file names
+        combined_df = pd.read_csv(consolidated_fp, sep="\t", dtype={"sample_id": str})
+        combined_df.index = combined_df.index.astype(str)
+        combined_df.index.name = "id"
+        return combined_df
+
     df_list = []
 
     # need to sort the contents of the data path
@@ -44,3 +57,20 @@ def combine_sample_metadata(data_path):
 @plugin.register_transformer
 def _1(data_path: ViromicsMetadataDirFmt) -> qiime2.Metadata:
     return qiime2.Metadata(combine_sample_metadata(data_path))
+
+
+@plugin.register_transformer
+def _2(data: CheckVDBDirFmt) -> CheckVDBPackedDirFmt:
+    ff = CheckVDBPackedDirFmt()
+    pack_directory(str(data), os.path.join(str(ff), "checkv_db.zip"))
+    return ff
+
+
+# The archive is extracted once into a local cache shared by all runs and the
+# returned directory format only links to the cached files
+@plugin.register_transformer
+def _3(data: CheckVDBPackedDirFmt) -> CheckVDBDirFmt:
+    cached_db = extract_to_cache(os.path.join(str(data), "checkv_db.zip"))
+    ff = CheckVDBDirFmt()
+    link_tree(cached_db, str(ff))
+    return ff
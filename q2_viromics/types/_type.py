@@ -9,4 +9,10 @@ from q2_types.sample_data import SampleData
 from qiime2.plugin import SemanticType
 
 CheckVDB = SemanticType("CheckVDB")
+CheckVDBPacked = SemanticType("CheckVDBPacked")
+CheckVContigIndex = SemanticType("CheckVContigIndex")
 ViromicsMetadata = SemanticType("ViromicsMetadata", variant_of=SampleData.field["type"])
+CheckVGenes = SemanticType("CheckVGenes", variant_of=SampleData.field["type"])
+CheckVIntermediates = SemanticType(
+    "CheckVIntermediates", variant_of=SampleData.field["type"]
+)